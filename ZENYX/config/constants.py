@@ -5,8 +5,17 @@
 Constantes utilizadas no sistema
 """
 
+from enum import Enum
+from types import MappingProxyType
+
+class StrEnum(str, Enum):
+    """Enum cujos membros são strings (comparáveis com os valores salvos no Redis)"""
+    
+    def __str__(self):
+        return self.value
+
 # Estados FSM para fluxos do bot
-class States:
+class States(StrEnum):
     # Estados do bot gerenciador
     VERIFICATION = "verification"
     CREATING_BOT = "creating_bot"
@@ -28,7 +37,7 @@ class States:
     WAITING_PLAN_PRICE = "waiting_plan_price"
 
 # Tipos de plano
-class PlanTypes:
+class PlanTypes(StrEnum):
     ONE_DAY = "1_day"
     SEVEN_DAYS = "7_days"
     FIFTEEN_DAYS = "15_days"
@@ -39,13 +48,13 @@ class PlanTypes:
     LIFETIME = "lifetime"
 
 # Tipos de mensagem
-class MessageTypes:
+class MessageTypes(StrEnum):
     TEXT = "text"
     MEDIA = "media"
     MEDIA_WITH_TEXT = "media_with_text"
 
 # Status de pagamento
-class PaymentStatus:
+class PaymentStatus(StrEnum):
     CREATED = "created"
     PENDING = "pending"
     PAID = "paid"
@@ -54,23 +63,23 @@ class PaymentStatus:
     FAILED = "failed"
 
 # Status do bot
-class BotStatus:
+class BotStatus(StrEnum):
     ACTIVE = "active"
     INACTIVE = "inactive"
     PAUSED = "paused"
     DELETED = "deleted"
 
-# Comandos
-COMMANDS = {
+# Comandos (somente leitura)
+COMMANDS = MappingProxyType({
     "start": "Iniciar o bot",
     "help": "Exibir ajuda",
     "suporte": "Entrar em contato com o suporte",
     "planos": "Ver planos disponíveis",
     "status": "Verificar status da assinatura",
-}
+})
 
-# Mensagens padrão
-DEFAULT_MESSAGES = {
+# Mensagens padrão (somente leitura)
+DEFAULT_MESSAGES = MappingProxyType({
     "welcome": "🔒 VERIFICAÇÃO NECESSÁRIA\n\nPara usar todas as funcionalidades do bot, você precisa entrar no nosso canal oficial:",
     "not_in_channel": "❌ Você ainda não entrou no canal. Por favor, entre no canal e tente novamente.",
     "verified": "✅ Verificação concluída! Agora você pode usar todas as funcionalidades do bot.",
@@ -81,4 +90,4 @@ DEFAULT_MESSAGES = {
     "bot_starting": "🔄 INICIANDO SEU BOT...\n\nSeu bot está sendo iniciado. Este processo pode levar alguns segundos.",
     "bot_started": "✅ BOT INICIADO COM SUCESSO!\n\nSeu bot @{username} está online e pronto para uso.\n\nConfigure as opções do seu bot enviando o comando /start para ele.",
     "bot_created": "✅ BOT CRIADO COM SUCESSO!\n\nSeu bot @{username} foi criado e configurado com sucesso!\n\nClique no botão abaixo para iniciar seu bot:",
-}
\ No newline at end of file
+})
\ No newline at end of file
@@ -11,13 +11,17 @@ from dotenv import load_dotenv
 # Carrega variáveis de ambiente
 load_dotenv()
 
+def _parse_id_set(value: str) -> frozenset:
+    """Converte uma lista de IDs separados por vírgula em um conjunto, ignorando itens vazios"""
+    return frozenset(int(item) for item in value.split(',') if item.strip())
+
 # Configurações do Bot Principal
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 BOT_USERNAME = os.getenv('BOT_USERNAME')
 
 # Configurações de Administração
 ADMIN_USER_ID = int(os.getenv('ADMIN_USER_ID', 0))
-ADMIN_IDS = list(map(int, os.getenv('ADMIN_IDS', '').split(',')))
+ADMIN_IDS = _parse_id_set(os.getenv('ADMIN_IDS', ''))
 
 # Configurações de Canal
 CHANNEL_ID = int(os.getenv('CHANNEL_ID', 0))
@@ -27,9 +31,11 @@ CHANNEL_USERNAME = os.getenv('CHANNEL_USERNAME')
 # Configurações PushinPay
 PUSHINPAY_TOKEN = os.getenv('PUSHINPAY_TOKEN')
 PUSHINPAY_API_URL = os.getenv('PUSHINPAY_API_URL')
+PUSHINPAY_MAX_INFLIGHT = int(os.getenv('PUSHINPAY_MAX_INFLIGHT', 20))
 
 # Configurações Redis
 REDIS_URL = os.getenv('REDIS_URL')
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 64))
 
 # Configurações de Pagamento
 PAYMENT_FEE = float(os.getenv('PAYMENT_FEE', 0.30))
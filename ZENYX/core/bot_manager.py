@@ -7,27 +7,88 @@ Gerenciamento de bots de usuários.
 
 import logging
 import asyncio
-from typing import Dict, List, Optional, Any
+import re
+import time
+from typing import Dict, List, Optional, Any, Tuple
+import aiohttp
 from aiogram import Bot
-from aiogram.utils.exceptions import TelegramAPIError
+from aiogram.bot.api import check_token
+from aiogram.utils.exceptions import TelegramAPIError, ValidationError
 
 from core.database import Database
+from core.telegram_session import get_telegram_session
+from core.utils import log_error_throttled
 from config.constants import BotStatus
 
 logger = logging.getLogger(__name__)
 
+# Caracteres aceitos no token (ele vai no caminho da URL da API)
+_TOKEN_RE = re.compile(r"\d+:[A-Za-z0-9_-]+")
+
+# Tempo máximo (em segundos) da validação de um token (getMe)
+TOKEN_CHECK_TIMEOUT = 5
+
+# Eventos sinalizados quando o bot de usuário em execução é parado (bot_id -> evento)
+_bot_stopped_events: Dict[str, asyncio.Event] = {}
+
+# Tempo máximo (em segundos) de espera pela parada de um bot ao excluí-lo
+BOT_STOP_TIMEOUT = 2
+
+# Evento que acorda o monitor de bots assim que um bot precisa ser parado
+_monitor_wakeup: Optional[asyncio.Event] = None
+
+def get_monitor_wakeup() -> asyncio.Event:
+    """Retorna o evento que acorda o monitor de bots, criando-o no primeiro uso"""
+    global _monitor_wakeup
+    if _monitor_wakeup is None:
+        _monitor_wakeup = asyncio.Event()
+    return _monitor_wakeup
+
+def mark_bot_running(bot_id: str):
+    """Registra que o bot de usuário foi iniciado"""
+    _bot_stopped_events[bot_id] = asyncio.Event()
+
+def mark_bot_stopped(bot_id: str):
+    """Sinaliza que o bot de usuário foi parado"""
+    event = _bot_stopped_events.pop(bot_id, None)
+    if event:
+        event.set()
+
 class UserBot:
     """Classe que representa um bot de usuário"""
     
+    __slots__ = ("bot", "bot_data", "db", "id", "user_id", "token", "username", "_cache")
+    
+    # Tempo (em segundos) que as configurações ficam em cache
+    CONFIG_CACHE_TTL = 30
+    
     def __init__(self, bot: Bot, bot_data: Dict, db: Database):
         """Inicializa um bot de usuário"""
         self.bot = bot
         self.bot_data = bot_data
         self.db = db
         self.id = bot_data.get("id")
-        self.user_id = bot_data.get("user_id")
+        # Normalizado uma única vez para comparar direto com os IDs do Telegram
+        owner_id = bot_data.get("user_id")
+        self.user_id = int(owner_id) if owner_id is not None else None
         self.token = bot_data.get("token")
         self.username = bot_data.get("username")
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+    
+    async def _get_feature_config(self, feature: str) -> Optional[Dict]:
+        """Obtém configuração de uma funcionalidade, usando o cache local"""
+        cached = self._cache.get(feature)
+        if cached and time.monotonic() - cached[0] < self.CONFIG_CACHE_TTL:
+            return cached[1]
+        
+        config_data = await self.db.get_bot_feature_config(self.id, feature)
+        self._cache[feature] = (time.monotonic(), config_data)
+        return config_data
+    
+    async def _save_feature_config(self, feature: str, config_data: Dict) -> bool:
+        """Salva configuração de uma funcionalidade e invalida o cache local"""
+        self._cache.pop(feature, None)
+        return await self.db.save_bot_feature_config(self.id, feature, config_data)
     
     async def get_username(self) -> str:
         """Obtém o username do bot"""
@@ -80,35 +141,35 @@ class UserBot:
     
     async def get_upsell_config(self) -> Optional[Dict]:
         """Obtém configuração de upsell"""
-        return await self.db.get_bot_feature_config(self.id, "upsell")
+        return await self._get_feature_config("upsell")
     
     async def save_upsell_config(self, config_data: Dict) -> bool:
         """Salva configuração de upsell"""
-        return await self.db.save_bot_feature_config(self.id, "upsell", config_data)
+        return await self._save_feature_config("upsell", config_data)
     
     async def get_order_bump_config(self) -> Optional[Dict]:
         """Obtém configuração de order bump"""
-        return await self.db.get_bot_feature_config(self.id, "order_bump")
+        return await self._get_feature_config("order_bump")
     
     async def save_order_bump_config(self, config_data: Dict) -> bool:
         """Salva configuração de order bump"""
-        return await self.db.save_bot_feature_config(self.id, "order_bump", config_data)
+        return await self._save_feature_config("order_bump", config_data)
     
     async def get_support_config(self) -> Optional[Dict]:
         """Obtém configuração de suporte"""
-        return await self.db.get_bot_feature_config(self.id, "support")
+        return await self._get_feature_config("support")
     
     async def save_support_config(self, config_data: Dict) -> bool:
         """Salva configuração de suporte"""
-        return await self.db.save_bot_feature_config(self.id, "support", config_data)
+        return await self._save_feature_config("support", config_data)
     
     async def get_chat_config(self) -> Optional[Dict]:
         """Obtém configuração de chat VIP"""
-        return await self.db.get_bot_feature_config(self.id, "chat")
+        return await self._get_feature_config("chat")
     
     async def save_chat_config(self, config_data: Dict) -> bool:
         """Salva configuração de chat VIP"""
-        return await self.db.save_bot_feature_config(self.id, "chat", config_data)
+        return await self._save_feature_config("chat", config_data)
     
     async def get_payments(self) -> List[Dict]:
         """Obtém pagamentos do bot"""
@@ -120,35 +181,69 @@ class UserBot:
     
     async def get_pushinpay_token(self) -> Optional[str]:
         """Obtém token da PushinPay configurado"""
-        pushinpay_config = await self.db.get_bot_feature_config(self.id, "pushinpay")
+        pushinpay_config = await self._get_feature_config("pushinpay")
         return pushinpay_config.get("token") if pushinpay_config else None
     
     async def save_pushinpay_token(self, token: str) -> bool:
         """Salva token da PushinPay"""
-        return await self.db.save_bot_feature_config(self.id, "pushinpay", {"token": token})
+        return await self._save_feature_config("pushinpay", {"token": token})
 
 
 class BotManager:
     """Classe para gerenciar bots de usuários"""
     
+    # Tempo (em segundos) e tamanho máximo do cache de dados dos bots
+    BOT_CACHE_TTL = 5
+    BOT_CACHE_MAX_SIZE = 10000
+    
     def __init__(self, main_bot: Bot, db: Database):
         """Inicializa o gerenciador de bots"""
         self.main_bot = main_bot
         self.db = db
+        self._bot_cache: Dict[str, Tuple[float, Dict]] = {}
+    
+    def _cache_bot(self, bot_id: str, bot_data: Dict):
+        """Guarda os dados do bot no cache local"""
+        self._bot_cache.pop(bot_id, None)
+        if len(self._bot_cache) >= self.BOT_CACHE_MAX_SIZE:
+            # Descarta a entrada mais antiga (o dict preserva a ordem de inserção)
+            self._bot_cache.pop(next(iter(self._bot_cache)))
+        self._bot_cache[bot_id] = (time.monotonic(), bot_data)
+    
+    async def _get_bot_info(self, token: str) -> Dict:
+        """Valida o token e retorna as informações do bot (getMe)"""
+        # O token vem da mensagem do usuário: valida o formato antes de montar a URL
+        check_token(token)
+        if not _TOKEN_RE.fullmatch(token):
+            raise ValidationError("Token is invalid!")
+        
+        session = await get_telegram_session()
+        async with session.get(
+            f"https://api.telegram.org/bot{token}/getMe",
+            timeout=aiohttp.ClientTimeout(total=TOKEN_CHECK_TIMEOUT)
+        ) as response:
+            try:
+                data = await response.json(content_type=None)
+            except ValueError:
+                data = None
+        
+        if not isinstance(data, dict) or not data.get("ok"):
+            description = data.get("description") if isinstance(data, dict) else None
+            raise TelegramAPIError(description or "Token inválido")
+        
+        return data["result"]
     
     async def create_user_bot(self, user_id: int, token: str) -> Optional[Dict]:
         """Cria um novo bot para o usuário"""
         try:
             # Verifica se o token é válido
-            temp_bot = Bot(token=token)
-            me = await temp_bot.get_me()
-            await temp_bot.close()
+            me = await self._get_bot_info(token)
             
             # Salva informações do bot
             bot_data = {
                 "token": token,
-                "username": me.username,
-                "first_name": me.first_name,
+                "username": me.get("username"),
+                "first_name": me.get("first_name"),
                 "user_id": user_id,
                 "status": BotStatus.ACTIVE
             }
@@ -157,57 +252,84 @@ class BotManager:
             
             if bot_id:
                 bot_data["id"] = bot_id
-                logger.info(f"Bot criado: {bot_id} - @{me.username} para usuário {user_id}")
+                logger.info(f"Bot criado: {bot_id} - @{bot_data['username']} para usuário {user_id}")
                 return bot_data
             
             return None
         except TelegramAPIError as e:
-            logger.error(f"Erro ao validar token do bot: {e}", exc_info=True)
+            log_error_throttled(logger, f"create_user_bot:{type(e).__name__}", f"Erro ao validar token do bot: {e}")
             return None
         except Exception as e:
-            logger.error(f"Erro ao criar bot para usuário {user_id}: {e}", exc_info=True)
+            log_error_throttled(logger, f"create_user_bot:{type(e).__name__}", f"Erro ao criar bot para usuário {user_id}: {e}")
             return None
     
     async def get_user_bots(self, user_id: int) -> List[Dict]:
         """Obtém todos os bots de um usuário"""
         return await self.db.get_user_bots(user_id)
     
-    async def get_user_bot(self, bot_id: str) -> Optional[Dict]:
-        """Obtém informações de um bot específico"""
-        return await self.db.get_user_bot(bot_id)
+    async def get_user_bot(self, bot_id: str, user_id: Optional[int] = None) -> Optional[Dict]:
+        """Obtém informações de um bot específico (apenas se pertencer a user_id, quando informado)"""
+        cached = self._bot_cache.get(bot_id)
+        if cached and time.monotonic() - cached[0] < self.BOT_CACHE_TTL:
+            bot_data = cached[1]
+        else:
+            bot_data = await self.db.get_user_bot(bot_id)
+            if not bot_data:
+                self._bot_cache.pop(bot_id, None)
+                return None
+            self._cache_bot(bot_id, bot_data)
+        
+        if user_id is not None and bot_data.get("user_id") != user_id:
+            return None
+        return dict(bot_data)
     
-    async def pause_user_bot(self, bot_id: str) -> bool:
-        """Pausa um bot de usuário"""
-        return await self.db.update_user_bot_status(bot_id, False)
+    async def pause_user_bot(self, bot_id: str, user_id: Optional[int] = None) -> Optional[Dict]:
+        """Pausa um bot de usuário e retorna os dados atualizados"""
+        bot_data = await self.db.update_user_bot_status(bot_id, False, user_id)
+        if bot_data:
+            self._cache_bot(bot_id, dict(bot_data))
+        return bot_data
     
-    async def resume_user_bot(self, bot_id: str) -> bool:
-        """Retoma um bot de usuário"""
-        return await self.db.update_user_bot_status(bot_id, True)
+    async def resume_user_bot(self, bot_id: str, user_id: Optional[int] = None) -> Optional[Dict]:
+        """Retoma um bot de usuário e retorna os dados atualizados"""
+        bot_data = await self.db.update_user_bot_status(bot_id, True, user_id)
+        if bot_data:
+            self._cache_bot(bot_id, dict(bot_data))
+        return bot_data
     
-    async def delete_user_bot(self, bot_id: str) -> bool:
+    async def delete_user_bot(self, bot_id: str, user_id: Optional[int] = None) -> bool:
         """Remove um bot de usuário"""
-        # Primeiro desativa o bot
-        await self.db.update_user_bot(bot_id, {"status": BotStatus.DELETED})
+        self._bot_cache.pop(bot_id, None)
         
-        # Aguarda um pouco para garantir que o bot será parado pelo sistema
-        await asyncio.sleep(2)
+        # Primeiro desativa o bot (e confere o dono, se informado)
+        bot_data = await self.db.update_user_bot(bot_id, {"status": BotStatus.DELETED}, user_id)
+        if not bot_data:
+            return False
+        
+        # Bot em execução: o monitor o para e só então remove o registro
+        event = _bot_stopped_events.get(bot_id)
+        if event:
+            get_monitor_wakeup().set()
+            try:
+                await asyncio.wait_for(event.wait(), timeout=BOT_STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"Bot {bot_id} ainda não foi parado em {BOT_STOP_TIMEOUT}s, será removido após a parada")
+            return True
         
         # Remove do banco de dados
-        return await self.db.delete_user_bot(bot_id)
+        return await self.db.delete_user_bot(bot_id, bot_data)
     
     async def update_user_bot_token(self, bot_id: str, new_token: str) -> bool:
         """Atualiza o token de um bot de usuário"""
         try:
             # Verifica se o token é válido
-            temp_bot = Bot(token=new_token)
-            me = await temp_bot.get_me()
-            await temp_bot.close()
+            me = await self._get_bot_info(new_token)
             
             # Atualiza informações do bot
             updates = {
                 "token": new_token,
-                "username": me.username,
-                "first_name": me.first_name,
+                "username": me.get("username"),
+                "first_name": me.get("first_name"),
                 "status": BotStatus.ACTIVE
             }
             
@@ -216,12 +338,13 @@ class BotManager:
             
             # Atualiza com o novo token
             result = await self.db.update_user_bot(bot_id, updates)
+            self._bot_cache.pop(bot_id, None)
             
             logger.info(f"Token atualizado para bot {bot_id}")
-            return result
+            return result is not None
         except TelegramAPIError as e:
-            logger.error(f"Erro ao validar novo token do bot: {e}", exc_info=True)
+            log_error_throttled(logger, f"update_user_bot_token:{type(e).__name__}", f"Erro ao validar novo token do bot: {e}")
             return False
         except Exception as e:
-            logger.error(f"Erro ao atualizar token do bot {bot_id}: {e}", exc_info=True)
+            log_error_throttled(logger, f"update_user_bot_token:{type(e).__name__}", f"Erro ao atualizar token do bot {bot_id}: {e}")
             return False
\ No newline at end of file
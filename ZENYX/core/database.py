@@ -5,17 +5,58 @@
 Gerenciamento de banco de dados Redis
 """
 
-import json
+import orjson
 import logging
 import aioredis
 import time
-from typing import Dict, List, Optional, Any, Union
+import redis.asyncio
+from typing import Dict, List, Optional, Any, Union, Tuple, AsyncIterator
 
-from config.settings import get_redis_url
+from config.settings import get_redis_url, REDIS_MAX_CONNECTIONS
 from config.constants import BotStatus, PaymentStatus
+from core.fsm_storage import PipelinedRedisStorage
 
 logger = logging.getLogger(__name__)
 
+# Índices de IDs lidos por User.get_all / UserBot.get_all (models/user.py e models/user_bot.py)
+_USERS_INDEX_KEY = "users:index"
+_BOTS_INDEX_KEY = "bots:index"
+
+# Pool de conexões compartilhado por todos os clientes Redis do processo
+_redis_pool: Optional[aioredis.ConnectionPool] = None
+
+def get_redis_pool() -> aioredis.ConnectionPool:
+    """Retorna o pool de conexões com o Redis, criando-o no primeiro uso"""
+    global _redis_pool
+    if _redis_pool is None:
+        _redis_pool = aioredis.ConnectionPool.from_url(
+            get_redis_url(),
+            max_connections=REDIS_MAX_CONNECTIONS,
+            encoding="utf-8",
+            decode_responses=True
+        )
+    return _redis_pool
+
+async def get_redis_connection() -> aioredis.Redis:
+    """Retorna um cliente Redis que usa o pool de conexões compartilhado"""
+    return aioredis.Redis(connection_pool=get_redis_pool())
+
+# Storage de FSM compartilhado pelo bot gerenciador e pelos bots de usuários
+_fsm_storage: Optional[PipelinedRedisStorage] = None
+
+def get_fsm_storage() -> PipelinedRedisStorage:
+    """Retorna o storage de FSM, criado uma única vez sobre um pool de conexões próprio"""
+    global _fsm_storage
+    if _fsm_storage is None:
+        # O storage do aiogram usa o cliente do redis-py, então recebe um pool desse driver
+        pool = redis.asyncio.ConnectionPool.from_url(
+            get_redis_url(),
+            max_connections=REDIS_MAX_CONNECTIONS,
+            decode_responses=True
+        )
+        _fsm_storage = PipelinedRedisStorage(connection_pool=pool)
+    return _fsm_storage
+
 class Database:
     """Classe para gerenciar operações no banco de dados Redis"""
     
@@ -23,16 +64,13 @@ class Database:
         """Inicializa a conexão com o Redis"""
         self.redis = None
         self.connected = False
+        self.bot_indexes_ready = False
     
     async def connect(self):
         """Estabelece conexão com o Redis"""
         if not self.connected:
             try:
-                self.redis = await aioredis.from_url(
-                    get_redis_url(),
-                    encoding="utf-8",
-                    decode_responses=True
-                )
+                self.redis = await get_redis_connection()
                 self.connected = True
                 logger.info("Conexão com o Redis estabelecida")
             except Exception as e:
@@ -57,7 +95,21 @@ class Database:
         """Obtém informações de um usuário"""
         await self.ensure_connected()
         user_data = await self.redis.get(f"user:{user_id}")
-        return json.loads(user_data) if user_data else None
+        return orjson.loads(user_data) if user_data else None
+    
+    async def get_users_bulk(self, user_ids: List[int]) -> Dict[int, Dict]:
+        """Obtém informações de vários usuários em uma única consulta"""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        
+        await self.ensure_connected()
+        values = await self.redis.mget([f"user:{user_id}" for user_id in user_ids])
+        return {
+            user_id: orjson.loads(value)
+            for user_id, value in zip(user_ids, values)
+            if value
+        }
     
     async def save_user(self, user_id: int, user_data: Dict) -> bool:
         """Salva informações de um usuário"""
@@ -67,12 +119,42 @@ class Database:
             user_data["created_at"] = time.time()
         
         try:
-            await self.redis.set(f"user:{user_id}", json.dumps(user_data))
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.set(f"user:{user_id}", orjson.dumps(user_data))
+                pipe.sadd(_USERS_INDEX_KEY, user_id)
+                await pipe.execute()
             return True
         except Exception as e:
             logger.error(f"Erro ao salvar usuário {user_id}: {e}", exc_info=True)
             return False
     
+    async def get_or_create_user(self, user_id: int, user_data: Dict) -> Dict:
+        """Obtém o usuário, criando-o se não existir, e o marca como alcançável em uma única ida ao Redis"""
+        await self.ensure_connected()
+        now = time.time()
+        user_data.setdefault("created_at", now)
+        user_data["updated_at"] = now
+        
+        key = f"user:{user_id}"
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(key, orjson.dumps(user_data), nx=True)
+        pipe.get(key)
+        pipe.srem("unreachable_users", user_id)
+        pipe.sadd(_USERS_INDEX_KEY, user_id)
+        created, stored, _, _ = await pipe.execute()
+        
+        if created or not stored:
+            return user_data
+        
+        # Usuário já existente: atualiza o username se ele mudou no Telegram
+        existing = orjson.loads(stored)
+        if "username" in user_data and existing.get("username") != user_data["username"]:
+            existing["username"] = user_data["username"]
+            existing["updated_at"] = now
+            await self.redis.set(key, orjson.dumps(existing))
+        
+        return existing
+    
     async def update_user(self, user_id: int, updates: Dict) -> bool:
         """Atualiza informações de um usuário"""
         user_data = await self.get_user(user_id)
@@ -86,7 +168,10 @@ class Database:
         """Remove um usuário do banco de dados"""
         await self.ensure_connected()
         try:
-            await self.redis.delete(f"user:{user_id}")
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(f"user:{user_id}")
+                pipe.srem(_USERS_INDEX_KEY, user_id)
+                await pipe.execute()
             return True
         except Exception as e:
             logger.error(f"Erro ao deletar usuário {user_id}: {e}", exc_info=True)
@@ -101,6 +186,17 @@ class Database:
         """Define o status de participação do usuário no canal"""
         return await self.update_user(user_id, {"in_channel": in_channel})
     
+    async def mark_user_unreachable(self, user_id: int) -> bool:
+        """Marca o usuário como inalcançável (bloqueou o bot ou conta desativada)"""
+        await self.ensure_connected()
+        await self.redis.sadd("unreachable_users", user_id)
+        return True
+    
+    async def get_unreachable_users(self) -> set:
+        """Obtém os IDs dos usuários marcados como inalcançáveis"""
+        await self.ensure_connected()
+        return {int(user_id) for user_id in await self.redis.smembers("unreachable_users")}
+    
     # Métodos para gerenciar bots de usuários
     
     async def save_user_bot(self, user_id: int, bot_data: Dict) -> str:
@@ -120,14 +216,16 @@ class Database:
             "status": BotStatus.ACTIVE
         })
         
-        # Salva dados do bot
-        await self.redis.set(f"bot:{bot_id}", json.dumps(bot_data))
-        
-        # Adiciona à lista de bots do usuário
-        await self.redis.sadd(f"user:{user_id}:bots", bot_id)
-        
-        # Adiciona à lista de todos os bots
-        await self.redis.sadd("all_bots", bot_id)
+        # Salva os dados, as listas e os índices de uma vez (atomicamente)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(f"bot:{bot_id}", orjson.dumps(bot_data))
+            pipe.sadd(f"user:{user_id}:bots", bot_id)
+            pipe.sadd("all_bots", bot_id)
+            pipe.sadd(_BOTS_INDEX_KEY, bot_id)
+            pipe.hincrby("bot_owners", user_id, 1)
+            pipe.sadd("active_bots", bot_id)
+            pipe.zadd("bot_ids", {bot_id: int(bot_id)})
+            await pipe.execute()
         
         return bot_id
     
@@ -135,7 +233,7 @@ class Database:
         """Obtém informações de um bot de usuário"""
         await self.ensure_connected()
         bot_data = await self.redis.get(f"bot:{bot_id}")
-        return json.loads(bot_data) if bot_data else None
+        return orjson.loads(bot_data) if bot_data else None
     
     async def get_user_bot_by_token(self, token: str) -> Optional[Dict]:
         """Obtém um bot pelo token"""
@@ -187,6 +285,85 @@ class Database:
         
         return bots
     
+    async def ensure_bot_indexes(self):
+        """Garante que os índices de donos, bots ativos e IDs existem (reconstrói a partir dos bots salvos)"""
+        if self.bot_indexes_ready:
+            return
+        
+        await self.ensure_connected()
+        if not await self.redis.exists("bot_indexes_built"):
+            all_bots = await self.get_all_user_bots()
+            
+            owners = {}
+            for bot in all_bots:
+                user_id = bot.get("user_id")
+                if user_id is not None:
+                    owners[user_id] = owners.get(user_id, 0) + 1
+            active_ids = [bot["id"] for bot in all_bots if bot.get("status") == BotStatus.ACTIVE]
+            
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete("bot_owners", "active_bots", "bot_ids")
+                if owners:
+                    pipe.hset("bot_owners", mapping=owners)
+                if active_ids:
+                    pipe.sadd("active_bots", *active_ids)
+                if all_bots:
+                    pipe.zadd("bot_ids", {bot["id"]: int(bot["id"]) for bot in all_bots})
+                pipe.set("bot_indexes_built", 1)
+                await pipe.execute()
+            
+            logger.info("Índices de bots reconstruídos")
+        
+        self.bot_indexes_ready = True
+    
+    async def get_unique_user_ids(self) -> List[int]:
+        """Obtém os IDs dos usuários que possuem bots"""
+        await self.ensure_bot_indexes()
+        return [int(user_id) for user_id in await self.redis.hkeys("bot_owners")]
+    
+    async def iter_unique_user_ids(self, chunk_size: int = 500) -> AsyncIterator[List[int]]:
+        """Percorre os IDs dos usuários que possuem bots em blocos, sem carregar todos de uma vez"""
+        await self.ensure_bot_indexes()
+        
+        chunk = []
+        async for user_id, _ in self.redis.hscan_iter("bot_owners", count=chunk_size):
+            chunk.append(int(user_id))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        
+        if chunk:
+            yield chunk
+    
+    async def count_unique_users(self) -> int:
+        """Obtém a quantidade de usuários que possuem bots"""
+        await self.ensure_bot_indexes()
+        return await self.redis.hlen("bot_owners")
+    
+    async def get_bots_page(self, after_id: Optional[str] = None, limit: int = 5, before_id: Optional[str] = None) -> List[Dict]:
+        """Obtém uma página de bots ordenada por ID, logo após after_id (ou logo antes de before_id)"""
+        await self.ensure_bot_indexes()
+        
+        if before_id:
+            bot_ids = await self.redis.zrevrangebyscore("bot_ids", f"({int(before_id)}", "-inf", start=0, num=limit)
+            bot_ids.reverse()
+        else:
+            min_score = f"({int(after_id)}" if after_id else "-inf"
+            bot_ids = await self.redis.zrangebyscore("bot_ids", min_score, "+inf", start=0, num=limit)
+        
+        if not bot_ids:
+            return []
+        
+        values = await self.redis.mget([f"bot:{bot_id}" for bot_id in bot_ids])
+        return [orjson.loads(value) for value in values if value]
+    
+    async def get_bot_counts(self) -> Tuple[int, int]:
+        """Obtém o total de bots e o total de bots ativos"""
+        await self.ensure_bot_indexes()
+        total = await self.redis.scard("all_bots")
+        active = await self.redis.scard("active_bots")
+        return total, active
+    
     async def get_new_user_bots(self, since_timestamp: float) -> List[Dict]:
         """Obtém bots criados após determinado timestamp"""
         all_bots = await self.get_all_user_bots()
@@ -197,41 +374,62 @@ class Database:
         all_bots = await self.get_all_user_bots()
         return [bot for bot in all_bots if bot.get("status") == BotStatus.INACTIVE or bot.get("status") == BotStatus.DELETED]
     
-    async def update_user_bot(self, bot_id: str, updates: Dict) -> bool:
-        """Atualiza informações de um bot"""
+    async def update_user_bot(self, bot_id: str, updates: Dict, user_id: Optional[int] = None) -> Optional[Dict]:
+        """Atualiza um bot (apenas se pertencer a user_id, quando informado) e retorna os dados atualizados"""
         bot_data = await self.get_user_bot(bot_id)
         if not bot_data:
-            return False
+            return None
+        if user_id is not None and bot_data.get("user_id") != user_id:
+            return None
         
         bot_data.update(updates)
         bot_data["updated_at"] = time.time()
         
         await self.ensure_connected()
-        await self.redis.set(f"bot:{bot_id}", json.dumps(bot_data))
-        return True
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(f"bot:{bot_id}", orjson.dumps(bot_data))
+        
+        # Mantém o índice de bots ativos atualizado
+        if "status" in updates:
+            if updates["status"] == BotStatus.ACTIVE:
+                pipe.sadd("active_bots", bot_id)
+            else:
+                pipe.srem("active_bots", bot_id)
+        
+        await pipe.execute()
+        return bot_data
     
-    async def update_user_bot_status(self, bot_id: str, is_active: bool) -> bool:
+    async def update_user_bot_status(self, bot_id: str, is_active: bool, user_id: Optional[int] = None) -> Optional[Dict]:
         """Atualiza o status de um bot"""
         status = BotStatus.ACTIVE if is_active else BotStatus.INACTIVE
-        return await self.update_user_bot(bot_id, {"status": status})
+        return await self.update_user_bot(bot_id, {"status": status}, user_id)
     
-    async def delete_user_bot(self, bot_id: str) -> bool:
-        """Remove um bot do sistema"""
+    async def delete_user_bot(self, bot_id: str, bot_data: Optional[Dict] = None) -> bool:
+        """Remove um bot do sistema (bot_data evita reler o bot quando já foi carregado)"""
         await self.ensure_connected()
         
-        bot_data = await self.get_user_bot(bot_id)
+        if bot_data is None:
+            bot_data = await self.get_user_bot(bot_id)
         if not bot_data:
             return False
         
         user_id = bot_data.get("user_id")
         
         try:
-            # Remove das listas
-            await self.redis.srem(f"user:{user_id}:bots", bot_id)
-            await self.redis.srem("all_bots", bot_id)
+            # Remove das listas, dos índices e os dados do bot de uma vez (atomicamente)
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.srem(f"user:{user_id}:bots", bot_id)
+                pipe.srem("all_bots", bot_id)
+                pipe.srem("active_bots", bot_id)
+                pipe.zrem("bot_ids", bot_id)
+                pipe.hincrby("bot_owners", user_id, -1)
+                pipe.delete(f"bot:{bot_id}")
+                pipe.srem(_BOTS_INDEX_KEY, bot_id)
+                results = await pipe.execute()
             
-            # Remove dados do bot
-            await self.redis.delete(f"bot:{bot_id}")
+            # Remove o dono do índice quando ele não tem mais bots
+            if results[4] <= 0:
+                await self.redis.hdel("bot_owners", user_id)
             
             return True
         except Exception as e:
@@ -257,7 +455,7 @@ class Database:
         })
         
         # Salva dados da mensagem
-        await self.redis.set(f"bot:{bot_id}:message:{message_id}", json.dumps(message_data))
+        await self.redis.set(f"bot:{bot_id}:message:{message_id}", orjson.dumps(message_data))
         
         # Adiciona à lista de mensagens do bot
         await self.redis.sadd(f"bot:{bot_id}:messages", message_id)
@@ -268,18 +466,18 @@ class Database:
         """Obtém uma mensagem de um bot"""
         await self.ensure_connected()
         message_data = await self.redis.get(f"bot:{bot_id}:message:{message_id}")
-        return json.loads(message_data) if message_data else None
+        return orjson.loads(message_data) if message_data else None
     
     async def get_bot_messages(self, bot_id: str) -> List[Dict]:
         """Obtém todas as mensagens de um bot"""
         await self.ensure_connected()
         message_ids = await self.redis.smembers(f"bot:{bot_id}:messages")
+        if not message_ids:
+            return []
         
-        messages = []
-        for message_id in message_ids:
-            message_data = await self.get_bot_message(bot_id, message_id)
-            if message_data:
-                messages.append(message_data)
+        # Busca todas as mensagens em uma única consulta
+        values = await self.redis.mget([f"bot:{bot_id}:message:{message_id}" for message_id in message_ids])
+        messages = [orjson.loads(value) for value in values if value]
         
         # Ordena por ordem de criação
         messages.sort(key=lambda x: int(x.get("id", 0)))
@@ -296,7 +494,7 @@ class Database:
         message_data["updated_at"] = time.time()
         
         await self.ensure_connected()
-        await self.redis.set(f"bot:{bot_id}:message:{message_id}", json.dumps(message_data))
+        await self.redis.set(f"bot:{bot_id}:message:{message_id}", orjson.dumps(message_data))
         return True
     
     async def delete_bot_message(self, bot_id: str, message_id: str) -> bool:
@@ -352,7 +550,7 @@ class Database:
         })
         
         # Salva dados do plano
-        await self.redis.set(f"bot:{bot_id}:plan:{plan_id}", json.dumps(plan_data))
+        await self.redis.set(f"bot:{bot_id}:plan:{plan_id}", orjson.dumps(plan_data))
         
         # Adiciona à lista de planos do bot
         await self.redis.sadd(f"bot:{bot_id}:plans", plan_id)
@@ -363,7 +561,7 @@ class Database:
         """Obtém um plano de um bot"""
         await self.ensure_connected()
         plan_data = await self.redis.get(f"bot:{bot_id}:plan:{plan_id}")
-        return json.loads(plan_data) if plan_data else None
+        return orjson.loads(plan_data) if plan_data else None
     
     async def get_bot_plans(self, bot_id: str) -> List[Dict]:
         """Obtém todos os planos de um bot"""
@@ -388,7 +586,7 @@ class Database:
         plan_data["updated_at"] = time.time()
         
         await self.ensure_connected()
-        await self.redis.set(f"bot:{bot_id}:plan:{plan_id}", json.dumps(plan_data))
+        await self.redis.set(f"bot:{bot_id}:plan:{plan_id}", orjson.dumps(plan_data))
         return True
     
     async def delete_bot_plan(self, bot_id: str, plan_id: str) -> bool:
@@ -421,7 +619,7 @@ class Database:
         payment_data["updated_at"] = time.time()
         
         # Salva dados do pagamento
-        await self.redis.set(f"payment:{payment_id}", json.dumps(payment_data))
+        await self.redis.set(f"payment:{payment_id}", orjson.dumps(payment_data))
         
         # Adiciona à lista de pagamentos do usuário
         user_id = payment_data.get("user_id")
@@ -439,7 +637,7 @@ class Database:
         """Obtém informações de um pagamento"""
         await self.ensure_connected()
         payment_data = await self.redis.get(f"payment:{payment_id}")
-        return json.loads(payment_data) if payment_data else None
+        return orjson.loads(payment_data) if payment_data else None
     
     async def update_payment(self, payment_id: str, updates: Dict) -> bool:
         """Atualiza informações de um pagamento"""
@@ -451,7 +649,7 @@ class Database:
         payment_data["updated_at"] = time.time()
         
         await self.ensure_connected()
-        await self.redis.set(f"payment:{payment_id}", json.dumps(payment_data))
+        await self.redis.set(f"payment:{payment_id}", orjson.dumps(payment_data))
         return True
     
     async def get_user_payments(self, user_id: int) -> List[Dict]:
@@ -501,7 +699,7 @@ class Database:
             config_data["created_at"] = time.time()
         
         try:
-            await self.redis.set(f"bot:{bot_id}:{feature}_config", json.dumps(config_data))
+            await self.redis.set(f"bot:{bot_id}:{feature}_config", orjson.dumps(config_data))
             return True
         except Exception as e:
             logger.error(f"Erro ao salvar configuração de {feature} para bot {bot_id}: {e}", exc_info=True)
@@ -511,7 +709,7 @@ class Database:
         """Obtém configuração de uma funcionalidade do bot"""
         await self.ensure_connected()
         config_data = await self.redis.get(f"bot:{bot_id}:{feature}_config")
-        return json.loads(config_data) if config_data else None
+        return orjson.loads(config_data) if config_data else None
     
     async def delete_bot_feature_config(self, bot_id: str, feature: str) -> bool:
         """Remove configuração de uma funcionalidade do bot"""
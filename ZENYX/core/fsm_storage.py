@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Storage de FSM em Redis com menos idas ao servidor.
+"""
+
+import typing
+from aiogram.contrib.fsm_storage.redis import RedisStorage2, STATE_KEY, STATE_DATA_KEY
+
+class PipelinedRedisStorage(RedisStorage2):
+    """RedisStorage2 que remove estado e dados da conversa em um único comando"""
+    
+    async def reset_state(self, *, chat: typing.Union[str, int, None] = None,
+                          user: typing.Union[str, int, None] = None,
+                          with_data: typing.Optional[bool] = True):
+        """Remove o estado (e os dados, se pedido) com um único DEL, em vez de dois comandos"""
+        # Usado por state.finish(), chamado ao fim de quase todo fluxo de configuração
+        chat, user = self.check_address(chat=chat, user=user)
+        keys = [self.generate_key(chat, user, STATE_KEY)]
+        if with_data:
+            keys.append(self.generate_key(chat, user, STATE_DATA_KEY))
+        await self._redis.delete(*keys)
\ No newline at end of file
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Sessão HTTP compartilhada com a API do Telegram.
+"""
+
+import ssl
+import logging
+from typing import Optional
+import aiohttp
+import certifi
+import orjson
+from aiogram import Bot
+from aiogram.utils import json
+
+logger = logging.getLogger(__name__)
+
+# Limites do pool de conexões com a API do Telegram (somando todos os bots do processo)
+TELEGRAM_CONNECTIONS_LIMIT = 200
+TELEGRAM_KEEPALIVE_TIMEOUT = 75
+TELEGRAM_DNS_CACHE_TTL = 300
+
+def _orjson_dumps(data) -> str:
+    """Serializa em JSON com orjson, devolvendo str como o aiogram espera"""
+    return orjson.dumps(data).decode()
+
+# O aiogram serializa teclados e parâmetros por aiogram.utils.json; usa orjson no lugar do json padrão
+json.dumps = _orjson_dumps
+json.loads = orjson.loads
+
+# Sessão compartilhada pelo bot gerenciador e por todos os bots de usuários
+_session: Optional[aiohttp.ClientSession] = None
+
+async def get_telegram_session() -> aiohttp.ClientSession:
+    """Retorna a sessão HTTP compartilhada, criando-a no primeiro uso"""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=TELEGRAM_CONNECTIONS_LIMIT,
+            keepalive_timeout=TELEGRAM_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=TELEGRAM_DNS_CACHE_TTL,
+            ssl=ssl.create_default_context(cafile=certifi.where())
+        )
+        _session = aiohttp.ClientSession(connector=connector, json_serialize=json.dumps)
+    return _session
+
+async def close_telegram_session():
+    """Fecha a sessão HTTP compartilhada"""
+    global _session
+    if _session and not _session.closed:
+        await _session.close()
+        logger.info("Sessão HTTP com o Telegram fechada")
+    _session = None
+
+class SharedSessionBot(Bot):
+    """Bot que envia suas requisições pela sessão HTTP compartilhada"""
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        # Como o bot não guarda sessão própria, bot.close() não derruba a sessão compartilhada
+        return await get_telegram_session()
\ No newline at end of file
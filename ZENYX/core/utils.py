@@ -5,29 +5,74 @@
 Funções utilitárias para o sistema
 """
 
+import asyncio
 import logging
 import time
 import random
 import string
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional, Any, Union, Tuple
 
 from aiogram import types
-from aiogram.utils.exceptions import ChatNotFound, BotBlocked, UserDeactivated
+from aiogram.utils.callback_data import CallbackData
+from aiogram.utils.exceptions import ChatNotFound, BotBlocked, UserDeactivated, MessageNotModified
+
+from config.constants import BotStatus
 
 logger = logging.getLogger(__name__)
 
+# Duração em dias de cada tipo de plano/período (vitalício não expira)
+_PLAN_DAYS = {
+    "1_day": 1,
+    "7_days": 7,
+    "15_days": 15,
+    "30_days": 30,
+    "3_months": 90,
+    "6_months": 180,
+    "1_year": 365,
+}
+
+# Duração em segundos de cada período (usado no cálculo de timestamps)
+_PLAN_SECONDS = {period: days * 86400 for period, days in _PLAN_DAYS.items()}
+
+# Texto de exibição de cada tipo de plano
+_PLAN_LABELS = {
+    "1_day": "1 Dia",
+    "7_days": "7 Dias",
+    "15_days": "15 Dias",
+    "30_days": "30 Dias",
+    "3_months": "3 Meses",
+    "6_months": "6 Meses",
+    "1_year": "1 Ano",
+    "lifetime": "Vitalício",
+}
+
+# Ícone e texto de status dos bots (qualquer status diferente de ativo é vermelho)
+_BOT_STATUS_ICONS = {BotStatus.ACTIVE: "🟢"}
+_BOT_STATUS_LABELS = {BotStatus.ACTIVE: "🟢 Ativo"}
+
+# Caracteres usados na geração de strings aleatórias
+_RANDOM_CHARS = string.ascii_letters + string.digits
+
 def generate_random_string(length: int = 10) -> str:
     """Gera uma string aleatória"""
-    chars = string.ascii_letters + string.digits
-    return ''.join(random.choice(chars) for _ in range(length))
+    return ''.join(random.choices(_RANDOM_CHARS, k=length))
+
+# Tabelas de tradução para formatação/conversão de preços
+_FORMAT_PRICE_TABLE = str.maketrans({'.': ','})
+_PARSE_PRICE_TABLE = str.maketrans({',': '.', ' ': None, 'R': None, '$': None})
+
+def get_bot_status_icon(status: Optional[str]) -> str:
+    """Retorna o ícone de status do bot"""
+    return _BOT_STATUS_ICONS.get(status, "🔴")
 
 def format_price(price: Union[int, float, str]) -> str:
     """Formata um preço para exibição"""
     try:
         if isinstance(price, str):
             price = float(price)
-        return f"R$ {price:.2f}".replace('.', ',')
+        return f"R$ {price:.2f}".translate(_FORMAT_PRICE_TABLE)
     except (ValueError, TypeError):
         logger.error(f"Erro ao formatar preço: {price}")
         return "R$ 0,00"
@@ -35,78 +80,158 @@ def format_price(price: Union[int, float, str]) -> str:
 def parse_price(price_str: str) -> float:
     """Converte uma string de preço para float"""
     try:
-        # Remove símbolo R$ e espaços
-        price_str = price_str.replace('R$', '').replace(' ', '')
-        # Substitui vírgula por ponto
-        price_str = price_str.replace(',', '.')
-        return float(price_str)
+        # Remove símbolo R$ e espaços e substitui vírgula por ponto
+        return float(price_str.translate(_PARSE_PRICE_TABLE))
     except (ValueError, TypeError):
         logger.error(f"Erro ao converter preço: {price_str}")
         return 0.0
 
 def get_period_timestamps(period: str) -> Tuple[float, float]:
     """Obtém timestamps de início e fim para um período"""
-    now = datetime.now()
     end_time = time.time()
+    seconds = _PLAN_SECONDS.get(period)
+    
+    if seconds is None:  # all_time
+        return 0, end_time
     
-    if period == "7_days":
-        start_time = (now - timedelta(days=7)).timestamp()
-    elif period == "15_days":
-        start_time = (now - timedelta(days=15)).timestamp()
-    elif period == "30_days":
-        start_time = (now - timedelta(days=30)).timestamp()
-    elif period == "3_months":
-        start_time = (now - timedelta(days=90)).timestamp()
-    elif period == "6_months":
-        start_time = (now - timedelta(days=180)).timestamp()
-    elif period == "1_year":
-        start_time = (now - timedelta(days=365)).timestamp()
-    else:  # all_time
-        start_time = 0
-    
-    return start_time, end_time
+    return end_time - seconds, end_time
 
 def calculate_plan_expiry_date(plan_type: str) -> Optional[datetime]:
     """Calcula a data de expiração com base no tipo de plano"""
-    now = datetime.now()
-    
-    if plan_type == "1_day":
-        return now + timedelta(days=1)
-    elif plan_type == "7_days":
-        return now + timedelta(days=7)
-    elif plan_type == "15_days":
-        return now + timedelta(days=15)
-    elif plan_type == "30_days":
-        return now + timedelta(days=30)
-    elif plan_type == "3_months":
-        return now + timedelta(days=90)
-    elif plan_type == "6_months":
-        return now + timedelta(days=180)
-    elif plan_type == "1_year":
-        return now + timedelta(days=365)
-    elif plan_type == "lifetime":
-        return None  # Sem expiração
-    
-    return None
+    days = _PLAN_DAYS.get(plan_type)
+    
+    # Planos vitalícios ou desconhecidos não expiram
+    if days is None:
+        return None
+    
+    return datetime.now() + timedelta(days=days)
+
+# Último registro de traceback completo por tipo de erro (chave -> instante)
+_ERROR_LOG_TIMES: Dict[str, float] = {}
+_ERROR_LOG_INTERVAL = 60
+
+def log_error_throttled(log: logging.Logger, key: str, message: str):
+    """Registra erro com traceback no máximo uma vez por minuto por chave; nas demais vezes só a mensagem"""
+    if not log.isEnabledFor(logging.ERROR):
+        return
+    
+    now = time.monotonic()
+    last_logged = _ERROR_LOG_TIMES.get(key)
+    if last_logged is None or now - last_logged >= _ERROR_LOG_INTERVAL:
+        _ERROR_LOG_TIMES[key] = now
+        log.error(message, exc_info=True)
+    else:
+        log.error(message)
+
+class RateLimiter:
+    """Limita a quantidade de operações por período (ex.: 30 mensagens por segundo)"""
+    
+    def __init__(self, max_rate: int, period: float = 1.0):
+        """Inicializa o limitador"""
+        self.interval = period / max_rate
+        self._next_time = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+    
+    async def __aenter__(self):
+        """Aguarda até que a próxima operação seja permitida"""
+        # O lock é criado sob demanda para ficar no loop de eventos em execução
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_time > now:
+                await asyncio.sleep(self._next_time - now)
+            self._next_time = max(now, self._next_time) + self.interval
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+# Cache de participação em canais: (canal, usuário) -> instante da verificação
+# Apenas resultados positivos são guardados, para que quem acabou de entrar
+# no canal seja reconhecido imediatamente
+_MEMBER_CACHE: Dict[Tuple[Union[int, str], int], float] = {}
+_MEMBER_CACHE_TTL = 60
+_MEMBER_CACHE_MAX_SIZE = 10000
+
+# Consultas em andamento: cliques repetidos aguardam a mesma chamada à API
+_MEMBER_CHECKS: Dict[Tuple[Union[int, str], int], asyncio.Future] = {}
 
 async def is_user_in_channel(bot, user_id: int, channel_id: Union[int, str]) -> bool:
     """Verifica se o usuário está em um canal/grupo"""
+    key = (channel_id, user_id)
+    checked_at = _MEMBER_CACHE.get(key)
+    if checked_at is not None and time.monotonic() - checked_at < _MEMBER_CACHE_TTL:
+        return True
+    
+    pending = _MEMBER_CHECKS.get(key)
+    if pending is None:
+        pending = asyncio.ensure_future(_fetch_channel_membership(bot, user_id, channel_id))
+        _MEMBER_CHECKS[key] = pending
+        pending.add_done_callback(lambda _: _MEMBER_CHECKS.pop(key, None))
+    
+    # shield: cancelar um dos cliques não cancela a consulta dos demais
+    return await asyncio.shield(pending)
+
+async def _fetch_channel_membership(bot, user_id: int, channel_id: Union[int, str]) -> bool:
+    """Consulta a API do Telegram e atualiza o cache de participação"""
+    key = (channel_id, user_id)
     try:
         member = await bot.get_chat_member(channel_id, user_id)
-        return member.status not in ['left', 'kicked']
+        is_member = member.status not in ['left', 'kicked']
+        
+        _MEMBER_CACHE.pop(key, None)
+        if is_member:
+            if len(_MEMBER_CACHE) >= _MEMBER_CACHE_MAX_SIZE:
+                # Descarta a entrada mais antiga (o dict preserva a ordem de inserção)
+                _MEMBER_CACHE.pop(next(iter(_MEMBER_CACHE)))
+            _MEMBER_CACHE[key] = time.monotonic()
+        
+        return is_member
     except (ChatNotFound, BotBlocked, UserDeactivated):
         return False
     except Exception as e:
-        logger.error(f"Erro ao verificar membro {user_id} em {channel_id}: {e}", exc_info=True)
+        log_error_throttled(logger, f"is_user_in_channel:{type(e).__name__}", f"Erro ao verificar membro {user_id} em {channel_id}: {e}")
         return False
 
+# Templates dos textos informativos
+_BOT_INFO_TEMPLATE = "🤖 Seus Bots\n@{username}\n🆔: {id}\n📊: Status ({status})"
+_CHANNEL_INFO_TEMPLATE = (
+    "👥 Configuração do Chat VIP\n"
+    "Status: ✅ Configurado\n"
+    "Chat: {chat_title}\n"
+    "ID: {chat_id}"
+)
+
 def create_bot_info_text(bot_data: Dict) -> str:
     """Cria texto com informações do bot"""
-    username = bot_data.get("username", "")
-    bot_id = bot_data.get("id", "")
-    status = "🟢 Ativo" if bot_data.get("status") == "active" else "🔴 Desativado"
-    
-    return f"🤖 Seus Bots\n@{username}\n🆔: {bot_id}\n📊: Status ({status})"
+    return _format_bot_info(bot_data.get("username", ""), bot_data.get("id", ""), bot_data.get("status"))
+
+@lru_cache(maxsize=1024)
+def _format_bot_info(username: str, bot_id: str, status: Optional[str]) -> str:
+    """Monta o texto informativo; o mesmo bot no mesmo status reaproveita o texto pronto"""
+    return _BOT_INFO_TEMPLATE.format_map({
+        "username": username,
+        "id": bot_id,
+        "status": _BOT_STATUS_LABELS.get(status, "🔴 Desativado")
+    })
+
+# Callbacks de gerenciamento dos bots do usuário
+# Ações: select, pause, resume, update_token, delete, confirm_delete
+user_bot_cb = CallbackData("bot", "action", "id")
+
+# Botões estáticos dos teclados (criados uma única vez)
+_BACK_TO_BOTS_BUTTON = types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_bots")
+_BACK_TO_MENU_BUTTON = types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_menu")
+_CREATE_BOT_BUTTON = types.InlineKeyboardButton(text="➕ Adicionar novo bot", callback_data="create_bot")
+
+# Teclado do menu principal, idêntico para todos os usuários
+MAIN_MENU_KEYBOARD = types.InlineKeyboardMarkup(row_width=2).add(
+    types.InlineKeyboardButton(text="🤖 Criar seu Bot", callback_data="create_bot"),
+    types.InlineKeyboardButton(text="📝 Meus bots", callback_data="my_bots"),
+).add(
+    types.InlineKeyboardButton(text="ℹ️ Como funciona", callback_data="how_it_works")
+)
 
 def build_menu_keyboard(user_id: int, bot_data: Dict) -> types.InlineKeyboardMarkup:
     """Cria teclado para menu de gerenciamento de bots"""
@@ -114,7 +239,7 @@ def build_menu_keyboard(user_id: int, bot_data: Dict) -> types.InlineKeyboardMar
     
     username = bot_data.get("username", "")
     bot_id = bot_data.get("id", "")
-    is_active = bot_data.get("status") == "active"
+    is_active = bot_data.get("status") == BotStatus.ACTIVE
     
     # Botão para acessar o bot
     keyboard.add(types.InlineKeyboardButton(
@@ -124,7 +249,7 @@ def build_menu_keyboard(user_id: int, bot_data: Dict) -> types.InlineKeyboardMar
     
     # Botão para pausar/ativar bot
     status_text = "🔴 Pausar Bot" if is_active else "🟢 Ativar Bot"
-    status_action = f"pause_bot:{bot_id}" if is_active else f"resume_bot:{bot_id}"
+    status_action = user_bot_cb.new(action="pause" if is_active else "resume", id=bot_id)
     keyboard.add(types.InlineKeyboardButton(
         text=status_text,
         callback_data=status_action
@@ -133,85 +258,56 @@ def build_menu_keyboard(user_id: int, bot_data: Dict) -> types.InlineKeyboardMar
     # Botão para atualizar token
     keyboard.add(types.InlineKeyboardButton(
         text="🔄 Atualizar Token",
-        callback_data=f"update_token:{bot_id}"
+        callback_data=user_bot_cb.new(action="update_token", id=bot_id)
     ))
     
     # Botão para excluir bot
     keyboard.add(types.InlineKeyboardButton(
         text="🗑 Excluir Bot",
-        callback_data=f"delete_bot:{bot_id}"
+        callback_data=user_bot_cb.new(action="delete", id=bot_id)
     ))
     
     # Botão para voltar
-    keyboard.add(types.InlineKeyboardButton(
-        text="🔙 Voltar",
-        callback_data="back_to_bots"
-    ))
+    keyboard.add(_BACK_TO_BOTS_BUTTON)
     
     return keyboard
 
 def build_bots_list_keyboard(bots: List[Dict]) -> types.InlineKeyboardMarkup:
     """Cria teclado com lista de bots do usuário"""
-    keyboard = types.InlineKeyboardMarkup(row_width=1)
+    # Uma linha por bot, seguida dos botões de criar novo bot e voltar
+    rows = [
+        [types.InlineKeyboardButton(
+            text=f"{get_bot_status_icon(bot.get('status'))} @{bot.get('username', '')}",
+            callback_data=user_bot_cb.new(action="select", id=bot.get('id', ''))
+        )]
+        for bot in bots
+    ]
+    rows.append([_CREATE_BOT_BUTTON])
+    rows.append([_BACK_TO_MENU_BUTTON])
     
-    for bot in bots:
-        username = bot.get("username", "")
-        bot_id = bot.get("id", "")
-        status = "🟢" if bot.get("status") == "active" else "🔴"
-        
-        keyboard.add(types.InlineKeyboardButton(
-            text=f"{status} @{username}",
-            callback_data=f"select_bot:{bot_id}"
-        ))
-    
-    # Adicionar botão para criar novo bot
-    keyboard.add(types.InlineKeyboardButton(
-        text="➕ Adicionar novo bot",
-        callback_data="create_bot"
-    ))
-    
-    # Botão para voltar
-    keyboard.add(types.InlineKeyboardButton(
-        text="🔙 Voltar",
-        callback_data="back_to_menu"
-    ))
-    
-    return keyboard
+    return types.InlineKeyboardMarkup(row_width=1, inline_keyboard=rows)
+
+async def edit_menu_message(message: types.Message, text: str, keyboard: types.InlineKeyboardMarkup):
+    """Atualiza uma mensagem de menu, sem chamar a API se ela já estiver igual"""
+    if message.text != text:
+        await message.edit_text(text, reply_markup=keyboard)
+    elif message.reply_markup is None or message.reply_markup.to_python() != keyboard.to_python():
+        # Se o texto não mudou, atualiza apenas os botões
+        try:
+            await message.edit_reply_markup(reply_markup=keyboard)
+        except MessageNotModified:
+            pass
 
 def build_channel_info_text(chat_config: Dict) -> str:
     """Cria texto com informações do canal/grupo configurado"""
     if not chat_config:
         return "👥 Configuração do Chat VIP\nStatus: ❌ Não configurado"
     
-    chat_id = chat_config.get("chat_id", "")
-    chat_title = chat_config.get("chat_title", "")
-    
-    text = (
-        "👥 Configuração do Chat VIP\n"
-        f"Status: ✅ Configurado\n"
-        f"Chat: {chat_title}\n"
-        f"ID: {chat_id}"
-    )
-    
-    return text
+    return _CHANNEL_INFO_TEMPLATE.format_map({
+        "chat_id": chat_config.get("chat_id", ""),
+        "chat_title": chat_config.get("chat_title", "")
+    })
 
 def get_plan_duration_text(plan_type: str) -> str:
     """Retorna texto da duração do plano"""
-    if plan_type == "1_day":
-        return "1 Dia"
-    elif plan_type == "7_days":
-        return "7 Dias"
-    elif plan_type == "15_days":
-        return "15 Dias"
-    elif plan_type == "30_days":
-        return "30 Dias"
-    elif plan_type == "3_months":
-        return "3 Meses"
-    elif plan_type == "6_months":
-        return "6 Meses"
-    elif plan_type == "1_year":
-        return "1 Ano"
-    elif plan_type == "lifetime":
-        return "Vitalício"
-    
-    return "Desconhecido"
\ No newline at end of file
+    return _PLAN_LABELS.get(plan_type, "Desconhecido")
\ No newline at end of file
@@ -5,17 +5,96 @@
 Handlers para interações de administradores com o bot gerenciador
 """
 
+import asyncio
 import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 from aiogram import Dispatcher, Bot, types
 from aiogram.dispatcher import FSMContext
+from aiogram.dispatcher.filters import Text
 from aiogram.dispatcher.filters.state import State, StatesGroup
+from aiogram.utils.callback_data import CallbackData
+from aiogram.utils.exceptions import (
+    RetryAfter, BotBlocked, UserDeactivated, ChatNotFound, CantInitiateConversation
+)
 
 from core.database import Database
 from core.bot_manager import BotManager
+from core.utils import get_bot_status_icon, RateLimiter
 from config.settings import ADMIN_IDS
+from config.constants import BotStatus
 
 logger = logging.getLogger(__name__)
 
+# Envio de broadcast: mensagens por lote e mensagens por segundo (limite do Telegram: 30/s)
+BROADCAST_BATCH_SIZE = 25
+BROADCAST_RATE_LIMIT = 25
+_broadcast_limiter = RateLimiter(BROADCAST_RATE_LIMIT)
+# Atualiza a mensagem de progresso a cada N envios (no máximo uma vez por intervalo, em segundos)
+BROADCAST_PROGRESS_EVERY = 500
+BROADCAST_PROGRESS_INTERVAL = 1.0
+
+# Quantidade de bots por página na listagem do admin
+ADMIN_BOTS_PER_PAGE = 5
+
+# Cache das estatísticas do painel (chave -> (instante, valor))
+ADMIN_CACHE_TTL = 30
+_cache: Dict[str, Tuple[float, Any]] = {}
+
+async def _cached(key: str, loader: Callable[[], Awaitable[Any]], ttl: float = ADMIN_CACHE_TTL) -> Any:
+    """Obtém um valor do cache ou carrega com a função informada"""
+    cached = _cache.get(key)
+    if cached and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    
+    value = await loader()
+    _cache[key] = (time.monotonic(), value)
+    return value
+
+def invalidate_cache(*keys: str):
+    """Invalida as chaves informadas do cache (ou todo o cache)"""
+    if not keys:
+        _cache.clear()
+    for key in keys:
+        _cache.pop(key, None)
+
+# Callbacks de gerenciamento de um bot (ações: view, pause, resume, delete, delete_confirm)
+admin_bot_cb = CallbackData("admin_bot", "action", "bot_id")
+
+# Formato antigo (<prefixo>:<id do bot>) dos botões que ainda estão nos chats -> ação de admin_bot_cb
+_LEGACY_ADMIN_BOT_ACTIONS = {
+    "admin_bot": "view",
+    "admin_bot_pause": "pause",
+    "admin_bot_resume": "resume",
+    "admin_bot_delete": "delete",
+    "admin_bot_delete_confirm": "delete_confirm",
+}
+
+def match_legacy_admin_bot(callback_query: types.CallbackQuery):
+    """Converte os botões no formato antigo para os dados de admin_bot_cb"""
+    prefix, sep, bot_id = callback_query.data.partition(":")
+    action = _LEGACY_ADMIN_BOT_ACTIONS.get(prefix)
+    if not sep or not action or not bot_id or ":" in bot_id:
+        return False
+    return {"callback_data": {"@": admin_bot_cb.prefix, "action": action, "bot_id": bot_id}}
+
+# Teclados estáticos do painel (criados uma única vez)
+_ADMIN_MENU_KEYBOARD = types.InlineKeyboardMarkup(row_width=1).add(
+    types.InlineKeyboardButton(text="📊 Estatísticas", callback_data="admin_stats"),
+    types.InlineKeyboardButton(text="📣 Enviar mensagem para todos", callback_data="admin_broadcast"),
+    types.InlineKeyboardButton(text="⚙️ Gerenciar bots", callback_data="admin_manage_bots")
+)
+_ADMIN_BACK_KEYBOARD = types.InlineKeyboardMarkup().add(
+    types.InlineKeyboardButton(text="🔙 Voltar", callback_data="admin_back")
+)
+_ADMIN_CANCEL_KEYBOARD = types.InlineKeyboardMarkup().add(
+    types.InlineKeyboardButton(text="❌ Cancelar", callback_data="admin_back")
+)
+_ADMIN_BROADCAST_CONFIRM_KEYBOARD = types.InlineKeyboardMarkup(row_width=2).add(
+    types.InlineKeyboardButton(text="✅ Confirmar", callback_data="admin_broadcast_confirm"),
+    types.InlineKeyboardButton(text="❌ Cancelar", callback_data="admin_back")
+)
+
 class AdminStates(StatesGroup):
     waiting_broadcast = State()
     waiting_broadcast_confirm = State()
@@ -30,57 +109,40 @@ async def admin_command(message: types.Message, state: FSMContext, db: Database)
         return
     
     # Mostra menu admin
-    keyboard = types.InlineKeyboardMarkup(row_width=1)
-    keyboard.add(
-        types.InlineKeyboardButton(text="📊 Estatísticas", callback_data="admin_stats"),
-        types.InlineKeyboardButton(text="📣 Enviar mensagem para todos", callback_data="admin_broadcast"),
-        types.InlineKeyboardButton(text="⚙️ Gerenciar bots", callback_data="admin_manage_bots")
-    )
-    
     await message.answer(
         "🔐 <b>Painel de Administração</b>\n\n"
         "Selecione uma opção:",
-        reply_markup=keyboard,
+        reply_markup=_ADMIN_MENU_KEYBOARD,
         parse_mode="HTML"
     )
 
 async def admin_stats_callback(callback_query: types.CallbackQuery, db: Database):
     """Handler para o callback de estatísticas"""
     # Obtém estatísticas do sistema
-    all_bots = await db.get_all_user_bots()
-    active_bots = len([bot for bot in all_bots if bot.get("status") == "active"])
+    total_bots, active_bots = await _cached("bot_counts", db.get_bot_counts)
     
-    # Obtém todos os usuários únicos
-    unique_users = set()
-    for bot in all_bots:
-        unique_users.add(bot.get("user_id"))
+    # Obtém a quantidade de usuários únicos (sem carregar os IDs)
+    total_users = await _cached("unique_users_count", db.count_unique_users)
     
     text = (
         "📊 <b>Estatísticas do Sistema</b>\n\n"
-        f"👥 Total de usuários: {len(unique_users)}\n"
-        f"🤖 Total de bots: {len(all_bots)}\n"
+        f"👥 Total de usuários: {total_users}\n"
+        f"🤖 Total de bots: {total_bots}\n"
         f"🟢 Bots ativos: {active_bots}\n"
-        f"🔴 Bots inativos: {len(all_bots) - active_bots}\n"
+        f"🔴 Bots inativos: {total_bots - active_bots}\n"
     )
     
-    # Botão para voltar
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="admin_back"))
-    
-    await callback_query.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+    await callback_query.message.edit_text(text, reply_markup=_ADMIN_BACK_KEYBOARD, parse_mode="HTML")
     await callback_query.answer()
 
 async def admin_broadcast_callback(callback_query: types.CallbackQuery, state: FSMContext):
     """Handler para o callback de broadcast"""
     # Solicita a mensagem para enviar
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(types.InlineKeyboardButton(text="❌ Cancelar", callback_data="admin_back"))
-    
     await callback_query.message.edit_text(
         "📣 <b>Enviar Mensagem para Todos</b>\n\n"
         "Digite a mensagem que deseja enviar para todos os usuários.\n\n"
         "Você pode usar formatação HTML.",
-        reply_markup=keyboard,
+        reply_markup=_ADMIN_CANCEL_KEYBOARD,
         parse_mode="HTML"
     )
     
@@ -91,66 +153,99 @@ async def admin_broadcast_callback(callback_query: types.CallbackQuery, state: F
 
 async def admin_broadcast_message(message: types.Message, state: FSMContext, db: Database):
     """Handler para receber a mensagem de broadcast"""
-    # Salva a mensagem no estado
-    await state.update_data(broadcast_message=message.html_text)
+    # Obtém a quantidade de usuários únicos (sem carregar os IDs)
+    total_users = await _cached("unique_users_count", db.count_unique_users)
     
-    # Obtém todos os usuários únicos
-    all_bots = await db.get_all_user_bots()
-    unique_users = set()
-    for bot in all_bots:
-        unique_users.add(bot.get("user_id"))
+    # Salva a mensagem e a quantidade de destinatários no estado
+    await state.update_data(broadcast_message=message.html_text, total_users=total_users)
     
     # Solicita confirmação
-    keyboard = types.InlineKeyboardMarkup(row_width=2)
-    keyboard.add(
-        types.InlineKeyboardButton(text="✅ Confirmar", callback_data="admin_broadcast_confirm"),
-        types.InlineKeyboardButton(text="❌ Cancelar", callback_data="admin_back")
-    )
-    
     await message.answer(
         "📣 <b>Confirmar Mensagem</b>\n\n"
-        f"A mensagem será enviada para <b>{len(unique_users)}</b> usuários.\n\n"
+        f"A mensagem será enviada para <b>{total_users}</b> usuários.\n\n"
         "<b>Prévia:</b>\n"
         f"{message.html_text}\n\n"
         "Deseja confirmar o envio?",
-        reply_markup=keyboard,
+        reply_markup=_ADMIN_BROADCAST_CONFIRM_KEYBOARD,
         parse_mode="HTML"
     )
     
     # Define o estado para aguardar confirmação
     await AdminStates.waiting_broadcast_confirm.set()
 
+async def send_broadcast_message(bot: Bot, db: Database, user_id: int, text: str) -> bool:
+    """Envia a mensagem de broadcast para um usuário"""
+    try:
+        try:
+            async with _broadcast_limiter:
+                await bot.send_message(user_id, text, parse_mode="HTML")
+        except RetryAfter as e:
+            # Limite de envio atingido: aguarda o tempo indicado e tenta uma única vez
+            await asyncio.sleep(e.timeout + 0.1)
+            async with _broadcast_limiter:
+                await bot.send_message(user_id, text, parse_mode="HTML")
+        return True
+    except (BotBlocked, UserDeactivated, ChatNotFound, CantInitiateConversation) as e:
+        # Falha permanente: não tenta mais enviar para este usuário
+        logger.info(f"Usuário {user_id} inalcançável no broadcast: {e}")
+        await db.mark_user_unreachable(user_id)
+        return False
+    except Exception as e:
+        logger.error(f"Erro ao enviar broadcast para {user_id}: {e}", exc_info=True)
+        return False
+
 async def admin_broadcast_confirm_callback(callback_query: types.CallbackQuery, state: FSMContext, bot: Bot, db: Database):
     """Handler para confirmar o envio do broadcast"""
     # Obtém a mensagem do estado
     data = await state.get_data()
     broadcast_message = data.get("broadcast_message")
     
-    # Obtém todos os usuários únicos
-    all_bots = await db.get_all_user_bots()
-    unique_users = set()
-    for bot_data in all_bots:
-        unique_users.add(bot_data.get("user_id"))
+    # Quantidade de usuários únicos calculada na prévia (os IDs são lidos em blocos durante o envio)
+    total_users = data.get("total_users")
+    if total_users is None:
+        total_users = await db.count_unique_users()
+    
+    # Usuários que já bloquearam o bot ou desativaram a conta são ignorados
+    unreachable_users = await db.get_unreachable_users()
     
     # Notifica início do envio
     await callback_query.message.edit_text(
         "📣 <b>Enviando Mensagem...</b>\n\n"
-        f"Enviando para {len(unique_users)} usuários.",
+        f"Enviando para {total_users} usuários.",
         parse_mode="HTML"
     )
     
     # Contador de sucessos e falhas
     success_count = 0
     fail_count = 0
+    last_progress = time.monotonic()
     
-    # Envia a mensagem para cada usuário
-    for user_id in unique_users:
-        try:
-            await bot.send_message(user_id, broadcast_message, parse_mode="HTML")
-            success_count += 1
-        except Exception as e:
-            logger.error(f"Erro ao enviar broadcast para {user_id}: {e}", exc_info=True)
-            fail_count += 1
+    # Envia a mensagem em lotes concorrentes, respeitando o limite de envio
+    async for chunk in db.iter_unique_user_ids(BROADCAST_BATCH_SIZE):
+        batch = [user_id for user_id in chunk if user_id not in unreachable_users]
+        
+        for result in asyncio.as_completed(
+            [send_broadcast_message(bot, db, user_id, broadcast_message) for user_id in batch]
+        ):
+            if await result:
+                success_count += 1
+            else:
+                fail_count += 1
+            
+            # Atualiza o progresso enquanto os demais envios continuam em andamento
+            processed = success_count + fail_count
+            if (processed % BROADCAST_PROGRESS_EVERY == 0
+                    and time.monotonic() - last_progress >= BROADCAST_PROGRESS_INTERVAL):
+                last_progress = time.monotonic()
+                try:
+                    await callback_query.message.edit_text(
+                        "📣 <b>Enviando Mensagem...</b>\n\n"
+                        f"Enviando para {total_users} usuários.\n"
+                        f"Processados: {processed}/{total_users}",
+                        parse_mode="HTML"
+                    )
+                except Exception as e:
+                    logger.error(f"Erro ao atualizar progresso do broadcast: {e}")
     
     # Notifica conclusão
     await callback_query.message.edit_text(
@@ -158,28 +253,47 @@ async def admin_broadcast_confirm_callback(callback_query: types.CallbackQuery,
         f"✅ Enviada com sucesso para {success_count} usuários.\n"
         f"❌ Falha ao enviar para {fail_count} usuários.",
         parse_mode="HTML",
-        reply_markup=types.InlineKeyboardMarkup().add(
-            types.InlineKeyboardButton(text="🔙 Voltar", callback_data="admin_back")
-        )
+        reply_markup=_ADMIN_BACK_KEYBOARD
     )
     
     # Reseta o estado
     await state.finish()
 
-async def admin_manage_bots_callback(callback_query: types.CallbackQuery, db: Database):
+async def admin_manage_bots_callback(
+    callback_query: types.CallbackQuery,
+    db: Database,
+    page: int = 1,
+    after_id: Optional[str] = None,
+    before_id: Optional[str] = None
+):
     """Handler para o callback de gerenciar bots"""
-    # Obtém todos os bots
-    all_bots = await db.get_all_user_bots()
+    await show_bots_page(callback_query, db, page, after_id, before_id)
+    await callback_query.answer()
+
+async def show_bots_page(
+    callback_query: types.CallbackQuery,
+    db: Database,
+    page: int = 1,
+    after_id: Optional[str] = None,
+    before_id: Optional[str] = None
+):
+    """Mostra uma página da lista de bots (sem responder ao callback)"""
+    if before_id:
+        # Voltando: página anterior ao primeiro bot da página atual
+        page_bots = await db.get_bots_page(limit=ADMIN_BOTS_PER_PAGE, before_id=before_id)
+        has_next = True
+    else:
+        # Avançando: busca um item a mais para saber se há próxima página
+        page_bots = await db.get_bots_page(after_id, ADMIN_BOTS_PER_PAGE + 1)
+        has_next = len(page_bots) > ADMIN_BOTS_PER_PAGE
+        page_bots = page_bots[:ADMIN_BOTS_PER_PAGE]
     
-    # Cria lista de bots com paginação
-    page = 1
-    items_per_page = 5
-    total_pages = (len(all_bots) + items_per_page - 1) // items_per_page
+    # Total de páginas calculado a partir da contagem em cache
+    total_bots, _ = await _cached("bot_counts", db.get_bot_counts)
+    total_pages = max(1, (total_bots + ADMIN_BOTS_PER_PAGE - 1) // ADMIN_BOTS_PER_PAGE)
     
-    # Slice dos bots para a página atual
-    start_idx = (page - 1) * items_per_page
-    end_idx = start_idx + items_per_page
-    page_bots = all_bots[start_idx:end_idx]
+    # Obtém os donos dos bots da página de uma só vez
+    owners = await db.get_users_bulk({bot.get("user_id") for bot in page_bots if bot.get("user_id")})
     
     # Cria teclado com bots e navegação
     keyboard = types.InlineKeyboardMarkup(row_width=1)
@@ -187,23 +301,24 @@ async def admin_manage_bots_callback(callback_query: types.CallbackQuery, db: Da
     for bot in page_bots:
         username = bot.get("username", "")
         bot_id = bot.get("id", "")
-        status = "🟢" if bot.get("status") == "active" else "🔴"
+        status = get_bot_status_icon(bot.get("status"))
+        owner_name = owners.get(bot.get("user_id"), {}).get("first_name") or "?"
         
         keyboard.add(types.InlineKeyboardButton(
-            text=f"{status} @{username} (ID: {bot_id})",
-            callback_data=f"admin_bot:{bot_id}"
+            text=f"{status} @{username} (ID: {bot_id}) - {owner_name}",
+            callback_data=admin_bot_cb.new(action="view", bot_id=bot_id)
         ))
     
-    # Adiciona botões de navegação
+    # Adiciona botões de navegação (o cursor é o ID do primeiro/último bot da página)
     nav_buttons = []
-    if page > 1:
+    if page > 1 and page_bots:
         nav_buttons.append(types.InlineKeyboardButton(
-            text="⬅️ Anterior", callback_data=f"admin_bots_page:{page-1}"
+            text="⬅️ Anterior", callback_data=f"admin_bots_page:{page-1}:<{page_bots[0].get('id')}"
         ))
     
-    if page < total_pages:
+    if has_next and page_bots:
         nav_buttons.append(types.InlineKeyboardButton(
-            text="➡️ Próxima", callback_data=f"admin_bots_page:{page+1}"
+            text="➡️ Próxima", callback_data=f"admin_bots_page:{page+1}:>{page_bots[-1].get('id')}"
         ))
     
     if nav_buttons:
@@ -213,40 +328,51 @@ async def admin_manage_bots_callback(callback_query: types.CallbackQuery, db: Da
     keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="admin_back"))
     
     await callback_query.message.edit_text(
-        f"⚙️ <b>Gerenciar Bots</b> (Página {page}/{total_pages})\n\n"
-        f"Total de bots: {len(all_bots)}\n\n"
+        f"⚙️ <b>Gerenciar Bots</b> (Página {min(page, total_pages)}/{total_pages})\n\n"
+        f"Total de bots: {total_bots}\n\n"
         "Selecione um bot para gerenciar:",
         reply_markup=keyboard,
         parse_mode="HTML"
     )
-    
-    await callback_query.answer()
 
 async def admin_bot_page_callback(callback_query: types.CallbackQuery, db: Database):
     """Handler para navegar entre páginas de bots"""
-    page = int(callback_query.data.split(':')[1])
+    # Formato: admin_bots_page:<página>:<direção><id do bot>
+    parts = callback_query.data.split(':', 2)
+    if len(parts) < 3:
+        # Botões antigos (admin_bots_page:<página>) não têm cursor: volta à primeira página
+        await admin_manage_bots_callback(callback_query, db)
+        return
     
-    # Chama a função de listagem com a página atualizada
-    await admin_manage_bots_callback(callback_query, db)
+    _, page, cursor = parts
+    direction, bot_id = cursor[:1], cursor[1:]
+    
+    # Chama a função de listagem a partir do cursor
+    if direction == "<":
+        await admin_manage_bots_callback(callback_query, db, int(page), before_id=bot_id)
+    else:
+        await admin_manage_bots_callback(callback_query, db, int(page), after_id=bot_id)
 
-async def admin_bot_callback(callback_query: types.CallbackQuery, db: Database, bot_manager: BotManager):
+async def admin_bot_callback(callback_query: types.CallbackQuery, db: Database, bot_manager: BotManager, bot_id: str):
     """Handler para gerenciar um bot específico"""
-    bot_id = callback_query.data.split(':')[1]
-    
-    # Obtém dados do bot
     bot_data = await bot_manager.get_user_bot(bot_id)
     
     if not bot_data:
         await callback_query.answer("❌ Bot não encontrado.", show_alert=True)
         return
     
+    await show_admin_bot(callback_query, db, bot_id, bot_data)
+    await callback_query.answer()
+
+async def show_admin_bot(callback_query: types.CallbackQuery, db: Database, bot_id: str, bot_data: Dict):
+    """Mostra a página de um bot (sem responder ao callback)"""
     # Obtém dados do usuário
     user_id = bot_data.get("user_id")
-    user_data = await db.get_user(user_id)
+    user_data = await db.get_user(user_id) or {}
     
     # Prepara informações do bot
     username = bot_data.get("username", "")
-    status = "🟢 Ativo" if bot_data.get("status") == "active" else "🔴 Inativo"
+    status = "🟢 Ativo" if bot_data.get("status") == BotStatus.ACTIVE else "🔴 Inativo"
     
     text = (
         f"🤖 <b>Bot: @{username}</b>\n\n"
@@ -261,61 +387,56 @@ async def admin_bot_callback(callback_query: types.CallbackQuery, db: Database,
     keyboard = types.InlineKeyboardMarkup(row_width=1)
     
     # Botão para ativar/desativar
-    is_active = bot_data.get("status") == "active"
+    is_active = bot_data.get("status") == BotStatus.ACTIVE
     status_text = "🔴 Desativar Bot" if is_active else "🟢 Ativar Bot"
-    status_action = f"admin_bot_pause:{bot_id}" if is_active else f"admin_bot_resume:{bot_id}"
+    status_action = admin_bot_cb.new(action="pause" if is_active else "resume", bot_id=bot_id)
     keyboard.add(types.InlineKeyboardButton(text=status_text, callback_data=status_action))
     
     # Botões para outras ações
     keyboard.add(
-        types.InlineKeyboardButton(text="🗑 Excluir Bot", callback_data=f"admin_bot_delete:{bot_id}"),
+        types.InlineKeyboardButton(text="🗑 Excluir Bot", callback_data=admin_bot_cb.new(action="delete", bot_id=bot_id)),
         types.InlineKeyboardButton(text="🔙 Voltar", callback_data="admin_manage_bots")
     )
     
     await callback_query.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
-    await callback_query.answer()
 
-async def admin_bot_pause_callback(callback_query: types.CallbackQuery, bot_manager: BotManager):
+async def admin_bot_pause_callback(callback_query: types.CallbackQuery, db: Database, bot_manager: BotManager, bot_id: str):
     """Handler para desativar um bot"""
-    bot_id = callback_query.data.split(':')[1]
+    # Pausa o bot e já recebe os dados atualizados
+    bot_data = await bot_manager.pause_user_bot(bot_id)
     
-    # Pausa o bot
-    success = await bot_manager.pause_user_bot(bot_id)
+    if not bot_data:
+        await callback_query.answer("❌ Bot não encontrado.", show_alert=True)
+        return
     
-    if success:
-        await callback_query.answer("✅ Bot desativado com sucesso!", show_alert=True)
-    else:
-        await callback_query.answer("❌ Erro ao desativar o bot.", show_alert=True)
+    invalidate_cache("bot_counts")
+    await callback_query.answer("✅ Bot desativado com sucesso!", show_alert=True)
     
-    # Volta para a página do bot
-    callback_query.data = f"admin_bot:{bot_id}"
-    await admin_bot_callback(callback_query, None, bot_manager)
+    # Volta para a página do bot com os dados já atualizados (o callback já foi respondido)
+    await show_admin_bot(callback_query, db, bot_id, bot_data)
 
-async def admin_bot_resume_callback(callback_query: types.CallbackQuery, bot_manager: BotManager):
+async def admin_bot_resume_callback(callback_query: types.CallbackQuery, db: Database, bot_manager: BotManager, bot_id: str):
     """Handler para ativar um bot"""
-    bot_id = callback_query.data.split(':')[1]
+    # Ativa o bot e já recebe os dados atualizados
+    bot_data = await bot_manager.resume_user_bot(bot_id)
     
-    # Ativa o bot
-    success = await bot_manager.resume_user_bot(bot_id)
+    if not bot_data:
+        await callback_query.answer("❌ Bot não encontrado.", show_alert=True)
+        return
     
-    if success:
-        await callback_query.answer("✅ Bot ativado com sucesso!", show_alert=True)
-    else:
-        await callback_query.answer("❌ Erro ao ativar o bot.", show_alert=True)
+    invalidate_cache("bot_counts")
+    await callback_query.answer("✅ Bot ativado com sucesso!", show_alert=True)
     
-    # Volta para a página do bot
-    callback_query.data = f"admin_bot:{bot_id}"
-    await admin_bot_callback(callback_query, None, bot_manager)
+    # Volta para a página do bot com os dados já atualizados (o callback já foi respondido)
+    await show_admin_bot(callback_query, db, bot_id, bot_data)
 
-async def admin_bot_delete_callback(callback_query: types.CallbackQuery, state: FSMContext):
+async def admin_bot_delete_callback(callback_query: types.CallbackQuery, bot_id: str):
     """Handler para confirmar exclusão de um bot"""
-    bot_id = callback_query.data.split(':')[1]
-    
     # Solicita confirmação
     keyboard = types.InlineKeyboardMarkup(row_width=2)
     keyboard.add(
-        types.InlineKeyboardButton(text="✅ Sim, excluir", callback_data=f"admin_bot_delete_confirm:{bot_id}"),
-        types.InlineKeyboardButton(text="❌ Cancelar", callback_data=f"admin_bot:{bot_id}")
+        types.InlineKeyboardButton(text="✅ Sim, excluir", callback_data=admin_bot_cb.new(action="delete_confirm", bot_id=bot_id)),
+        types.InlineKeyboardButton(text="❌ Cancelar", callback_data=admin_bot_cb.new(action="view", bot_id=bot_id))
     )
     
     await callback_query.message.edit_text(
@@ -329,24 +450,24 @@ async def admin_bot_delete_callback(callback_query: types.CallbackQuery, state:
     
     await callback_query.answer()
 
-async def admin_bot_delete_confirm_callback(callback_query: types.CallbackQuery, bot_manager: BotManager):
+async def admin_bot_delete_confirm_callback(callback_query: types.CallbackQuery, db: Database, bot_manager: BotManager, bot_id: str):
     """Handler para confirmar exclusão de um bot"""
-    bot_id = callback_query.data.split(':')[1]
-    
     # Exclui o bot
     success = await bot_manager.delete_user_bot(bot_id)
+    invalidate_cache("bot_counts", "unique_users_count")
     
     if success:
         await callback_query.answer("✅ Bot excluído com sucesso!", show_alert=True)
         
-        # Volta para a lista de bots
-        await admin_manage_bots_callback(callback_query, None)
+        # Volta para a lista de bots (o callback já foi respondido)
+        await show_bots_page(callback_query, db)
     else:
         await callback_query.answer("❌ Erro ao excluir o bot.", show_alert=True)
         
-        # Volta para a página do bot
-        callback_query.data = f"admin_bot:{bot_id}"
-        await admin_bot_callback(callback_query, None, bot_manager)
+        # Volta para a página do bot, se ele ainda existir
+        bot_data = await bot_manager.get_user_bot(bot_id)
+        if bot_data:
+            await show_admin_bot(callback_query, db, bot_id, bot_data)
 
 async def admin_back_callback(callback_query: types.CallbackQuery, state: FSMContext):
     """Handler para voltar ao menu admin"""
@@ -354,17 +475,10 @@ async def admin_back_callback(callback_query: types.CallbackQuery, state: FSMCon
     await state.finish()
     
     # Volta para o menu admin
-    keyboard = types.InlineKeyboardMarkup(row_width=1)
-    keyboard.add(
-        types.InlineKeyboardButton(text="📊 Estatísticas", callback_data="admin_stats"),
-        types.InlineKeyboardButton(text="📣 Enviar mensagem para todos", callback_data="admin_broadcast"),
-        types.InlineKeyboardButton(text="⚙️ Gerenciar bots", callback_data="admin_manage_bots")
-    )
-    
     await callback_query.message.edit_text(
         "🔐 <b>Painel de Administração</b>\n\n"
         "Selecione uma opção:",
-        reply_markup=keyboard,
+        reply_markup=_ADMIN_MENU_KEYBOARD,
         parse_mode="HTML"
     )
     
@@ -382,61 +496,75 @@ def register_admin_handlers(dp: Dispatcher, bot: Bot, bot_manager: BotManager, d
     # Callbacks
     dp.register_callback_query_handler(
         lambda c: admin_stats_callback(c, db),
-        lambda c: c.data == "admin_stats",
+        Text(equals="admin_stats"),
         state="*"
     )
     
     dp.register_callback_query_handler(
         admin_broadcast_callback,
-        lambda c: c.data == "admin_broadcast",
+        Text(equals="admin_broadcast"),
         state="*"
     )
     
     dp.register_callback_query_handler(
         lambda c: admin_manage_bots_callback(c, db),
-        lambda c: c.data == "admin_manage_bots",
+        Text(equals="admin_manage_bots"),
         state="*"
     )
     
     dp.register_callback_query_handler(
         lambda c: admin_bot_page_callback(c, db),
-        lambda c: c.data.startswith("admin_bots_page:"),
+        Text(startswith="admin_bots_page:"),
+        state="*"
+    )
+    
+    dp.register_callback_query_handler(
+        lambda c, callback_data: admin_bot_callback(c, db, bot_manager, callback_data["bot_id"]),
+        admin_bot_cb.filter(action="view"),
         state="*"
     )
     
     dp.register_callback_query_handler(
-        lambda c: admin_bot_callback(c, db, bot_manager),
-        lambda c: c.data.startswith("admin_bot:"),
+        lambda c, callback_data: admin_bot_pause_callback(c, db, bot_manager, callback_data["bot_id"]),
+        admin_bot_cb.filter(action="pause"),
         state="*"
     )
     
     dp.register_callback_query_handler(
-        lambda c: admin_bot_pause_callback(c, bot_manager),
-        lambda c: c.data.startswith("admin_bot_pause:"),
+        lambda c, callback_data: admin_bot_resume_callback(c, db, bot_manager, callback_data["bot_id"]),
+        admin_bot_cb.filter(action="resume"),
         state="*"
     )
     
     dp.register_callback_query_handler(
-        lambda c: admin_bot_resume_callback(c, bot_manager),
-        lambda c: c.data.startswith("admin_bot_resume:"),
+        lambda c, callback_data: admin_bot_delete_callback(c, callback_data["bot_id"]),
+        admin_bot_cb.filter(action="delete"),
         state="*"
     )
     
     dp.register_callback_query_handler(
-        admin_bot_delete_callback,
-        lambda c: c.data.startswith("admin_bot_delete:"),
+        lambda c, callback_data: admin_bot_delete_confirm_callback(c, db, bot_manager, callback_data["bot_id"]),
+        admin_bot_cb.filter(action="delete_confirm"),
         state="*"
     )
     
+    # Botões no formato antigo, encaminhados para os mesmos handlers
+    legacy_routes = {
+        "view": lambda c, bot_id: admin_bot_callback(c, db, bot_manager, bot_id),
+        "pause": lambda c, bot_id: admin_bot_pause_callback(c, db, bot_manager, bot_id),
+        "resume": lambda c, bot_id: admin_bot_resume_callback(c, db, bot_manager, bot_id),
+        "delete": lambda c, bot_id: admin_bot_delete_callback(c, bot_id),
+        "delete_confirm": lambda c, bot_id: admin_bot_delete_confirm_callback(c, db, bot_manager, bot_id),
+    }
     dp.register_callback_query_handler(
-        lambda c: admin_bot_delete_confirm_callback(c, bot_manager),
-        lambda c: c.data.startswith("admin_bot_delete_confirm:"),
+        lambda c, callback_data: legacy_routes[callback_data["action"]](c, callback_data["bot_id"]),
+        match_legacy_admin_bot,
         state="*"
     )
     
     dp.register_callback_query_handler(
         admin_back_callback,
-        lambda c: c.data == "admin_back",
+        Text(equals="admin_back"),
         state="*"
     )
     
@@ -448,6 +576,6 @@ def register_admin_handlers(dp: Dispatcher, bot: Bot, bot_manager: BotManager, d
     
     dp.register_callback_query_handler(
         lambda c, s: admin_broadcast_confirm_callback(c, s, bot, db),
-        lambda c: c.data == "admin_broadcast_confirm",
+        Text(equals="admin_broadcast_confirm"),
         state=AdminStates.waiting_broadcast_confirm
     )
\ No newline at end of file
@@ -6,41 +6,52 @@ Handlers para interações dos usuários com o bot gerenciador
 """
 
 import logging
+from functools import partial
 from aiogram import Dispatcher, Bot, types
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import State, StatesGroup
 
 from core.database import Database
 from core.bot_manager import BotManager
-from core.utils import build_bots_list_keyboard, build_menu_keyboard, create_bot_info_text
+from core.utils import build_bots_list_keyboard, build_menu_keyboard, create_bot_info_text, edit_menu_message, MAIN_MENU_KEYBOARD, user_bot_cb
 from config.constants import DEFAULT_MESSAGES, States
 
 logger = logging.getLogger(__name__)
 
+# Teclados estáticos, montados uma única vez
+_BACK_TO_MENU_KEYBOARD = types.InlineKeyboardMarkup().add(
+    types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_menu")
+)
+_EMPTY_BOTS_KEYBOARD = types.InlineKeyboardMarkup().add(
+    types.InlineKeyboardButton(text="➕ Criar Bot", callback_data="create_bot"),
+    types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_menu")
+)
+
+# Textos fixos das telas de ajuda e de erro
+_HOW_IT_WORKS_TEXT = (
+    "ℹ️ <b>Como funciona o Zenyx VIPs</b>\n\n"
+    "Este sistema permite que você crie e gerencie seu próprio bot para vendas de acessos VIP no Telegram.\n\n"
+    "<b>Passo a passo:</b>\n"
+    "1. Crie um bot pelo @BotFather\n"
+    "2. Copie o token e adicione aqui\n"
+    "3. Configure mensagens, planos e integrações de pagamento\n"
+    "4. Adicione seu bot a grupos/canais para gerenciar\n"
+    "5. Comece a vender acessos VIP!\n\n"
+    "Para começar, clique em <b>🤖 Criar seu Bot</b>"
+)
+_INVALID_TOKEN_TEXT = (
+    "❌ Token inválido ou bot indisponível.\n\n"
+    "Por favor, verifique se o token está correto e tente novamente.\n\n"
+    "Para cancelar, clique em 'Voltar'."
+)
+
 class BotCreationStates(StatesGroup):
     waiting_token = State()
 
-async def how_it_works_callback(callback_query: types.CallbackQuery):
+async def how_it_works_callback(callback_query: types.CallbackQuery, state: FSMContext):
     """Handler para o callback de 'Como funciona'"""
-    # Texto explicativo sobre como o sistema funciona
-    text = (
-        "ℹ️ <b>Como funciona o Zenyx VIPs</b>\n\n"
-        "Este sistema permite que você crie e gerencie seu próprio bot para vendas de acessos VIP no Telegram.\n\n"
-        "<b>Passo a passo:</b>\n"
-        "1. Crie um bot pelo @BotFather\n"
-        "2. Copie o token e adicione aqui\n"
-        "3. Configure mensagens, planos e integrações de pagamento\n"
-        "4. Adicione seu bot a grupos/canais para gerenciar\n"
-        "5. Comece a vender acessos VIP!\n\n"
-        "Para começar, clique em <b>🤖 Criar seu Bot</b>"
-    )
-    
-    # Botão para voltar
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_menu"))
-    
     # Edita a mensagem com a explicação
-    await callback_query.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+    await callback_query.message.edit_text(_HOW_IT_WORKS_TEXT, reply_markup=_BACK_TO_MENU_KEYBOARD, parse_mode="HTML")
     await callback_query.answer()
 
 async def create_bot_callback(callback_query: types.CallbackQuery, state: FSMContext):
@@ -51,9 +62,7 @@ async def create_bot_callback(callback_query: types.CallbackQuery, state: FSMCon
     # Envia instruções para criar um bot
     await callback_query.message.edit_text(
         DEFAULT_MESSAGES["bot_creation_instructions"],
-        reply_markup=types.InlineKeyboardMarkup().add(
-            types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_menu")
-        )
+        reply_markup=_BACK_TO_MENU_KEYBOARD
     )
     
     # Define o estado para aguardar o token
@@ -102,20 +111,18 @@ async def token_message(message: types.Message, state: FSMContext, bot_manager:
         await state.finish()
     else:
         # Notifica erro e solicita novo token
-        await status_message.edit_text(
-            "❌ Token inválido ou bot indisponível.\n\n"
-            "Por favor, verifique se o token está correto e tente novamente.\n\n"
-            "Para cancelar, clique em 'Voltar'.",
-            reply_markup=types.InlineKeyboardMarkup().add(
-                types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_menu")
-            )
-        )
+        await status_message.edit_text(_INVALID_TOKEN_TEXT, reply_markup=_BACK_TO_MENU_KEYBOARD)
         
         # Mantém o estado para aguardar um novo token
         await BotCreationStates.waiting_token.set()
 
 async def my_bots_callback(callback_query: types.CallbackQuery, state: FSMContext, bot_manager: BotManager):
     """Handler para o callback de 'Meus bots'"""
+    await show_user_bots(callback_query, bot_manager)
+    await callback_query.answer()
+
+async def show_user_bots(callback_query: types.CallbackQuery, bot_manager: BotManager):
+    """Mostra a lista de bots do usuário (sem responder ao callback)"""
     user_id = callback_query.from_user.id
     
     # Obtém os bots do usuário
@@ -132,106 +139,76 @@ async def my_bots_callback(callback_query: types.CallbackQuery, state: FSMContex
         )
     else:
         # Se não tiver bots, mostra mensagem e botão para criar
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(
-            types.InlineKeyboardButton(text="➕ Criar Bot", callback_data="create_bot"),
-            types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_menu")
-        )
-        
         await callback_query.message.edit_text(
             "🤖 Você ainda não tem bots criados.\n\n"
             "Clique em 'Criar Bot' para começar!",
-            reply_markup=keyboard
+            reply_markup=_EMPTY_BOTS_KEYBOARD
         )
-    
-    await callback_query.answer()
 
-async def select_bot_callback(callback_query: types.CallbackQuery, state: FSMContext, bot_manager: BotManager):
+async def show_bot_menu(callback_query: types.CallbackQuery, user_id: int, bot_data: dict):
+    """Mostra as informações do bot, sem chamar a API se a mensagem já estiver igual"""
+    text = create_bot_info_text(bot_data)
+    keyboard = build_menu_keyboard(user_id, bot_data)
+    await edit_menu_message(callback_query.message, text, keyboard)
+
+async def select_bot_callback(callback_query: types.CallbackQuery, state: FSMContext, callback_data: dict, bot_manager: BotManager):
     """Handler para selecionar um bot da lista"""
-    bot_id = callback_query.data.split(':')[1]
+    bot_id = callback_data["id"]
     user_id = callback_query.from_user.id
     
-    # Obtém dados do bot
-    bot_data = await bot_manager.get_user_bot(bot_id)
+    # Obtém dados do bot, apenas se pertencer ao usuário
+    bot_data = await bot_manager.get_user_bot(bot_id, user_id)
     
-    if bot_data and str(bot_data.get("user_id")) == str(user_id):
+    if bot_data:
         # Mostra informações do bot e opções
-        text = create_bot_info_text(bot_data)
-        keyboard = build_menu_keyboard(user_id, bot_data)
-        
-        await callback_query.message.edit_text(text, reply_markup=keyboard)
+        await show_bot_menu(callback_query, user_id, bot_data)
+        await callback_query.answer()
     else:
         # Bot não encontrado ou não pertence ao usuário
         await callback_query.answer("❌ Bot não encontrado.", show_alert=True)
-    
-    await callback_query.answer()
 
-async def pause_bot_callback(callback_query: types.CallbackQuery, bot_manager: BotManager):
+async def pause_bot_callback(callback_query: types.CallbackQuery, state: FSMContext, callback_data: dict, bot_manager: BotManager):
     """Handler para pausar um bot"""
-    bot_id = callback_query.data.split(':')[1]
+    bot_id = callback_data["id"]
     user_id = callback_query.from_user.id
     
-    # Obtém dados do bot
-    bot_data = await bot_manager.get_user_bot(bot_id)
+    # Pausa o bot, conferindo o dono, e já recebe os dados atualizados
+    bot_data = await bot_manager.pause_user_bot(bot_id, user_id)
     
-    if bot_data and str(bot_data.get("user_id")) == str(user_id):
-        # Pausa o bot
-        success = await bot_manager.pause_user_bot(bot_id)
+    if bot_data:
+        await callback_query.answer("✅ Bot pausado com sucesso!", show_alert=True)
         
-        if success:
-            await callback_query.answer("✅ Bot pausado com sucesso!", show_alert=True)
-            
-            # Atualiza dados do bot
-            bot_data = await bot_manager.get_user_bot(bot_id)
-            
-            # Atualiza mensagem com status atualizado
-            text = create_bot_info_text(bot_data)
-            keyboard = build_menu_keyboard(user_id, bot_data)
-            
-            await callback_query.message.edit_text(text, reply_markup=keyboard)
-        else:
-            await callback_query.answer("❌ Erro ao pausar o bot.", show_alert=True)
+        # Atualiza mensagem com status atualizado
+        await show_bot_menu(callback_query, user_id, bot_data)
     else:
         await callback_query.answer("❌ Bot não encontrado.", show_alert=True)
 
-async def resume_bot_callback(callback_query: types.CallbackQuery, bot_manager: BotManager):
+async def resume_bot_callback(callback_query: types.CallbackQuery, state: FSMContext, callback_data: dict, bot_manager: BotManager):
     """Handler para ativar um bot"""
-    bot_id = callback_query.data.split(':')[1]
+    bot_id = callback_data["id"]
     user_id = callback_query.from_user.id
     
-    # Obtém dados do bot
-    bot_data = await bot_manager.get_user_bot(bot_id)
+    # Ativa o bot, conferindo o dono, e já recebe os dados atualizados
+    bot_data = await bot_manager.resume_user_bot(bot_id, user_id)
     
-    if bot_data and str(bot_data.get("user_id")) == str(user_id):
-        # Ativa o bot
-        success = await bot_manager.resume_user_bot(bot_id)
+    if bot_data:
+        await callback_query.answer("✅ Bot ativado com sucesso!", show_alert=True)
         
-        if success:
-            await callback_query.answer("✅ Bot ativado com sucesso!", show_alert=True)
-            
-            # Atualiza dados do bot
-            bot_data = await bot_manager.get_user_bot(bot_id)
-            
-            # Atualiza mensagem com status atualizado
-            text = create_bot_info_text(bot_data)
-            keyboard = build_menu_keyboard(user_id, bot_data)
-            
-            await callback_query.message.edit_text(text, reply_markup=keyboard)
-        else:
-            await callback_query.answer("❌ Erro ao ativar o bot.", show_alert=True)
+        # Atualiza mensagem com status atualizado
+        await show_bot_menu(callback_query, user_id, bot_data)
     else:
         await callback_query.answer("❌ Bot não encontrado.", show_alert=True)
 
-async def update_token_callback(callback_query: types.CallbackQuery, state: FSMContext):
+async def update_token_callback(callback_query: types.CallbackQuery, state: FSMContext, callback_data: dict):
     """Handler para atualizar o token de um bot"""
-    bot_id = callback_query.data.split(':')[1]
+    bot_id = callback_data["id"]
     
     # Guarda o ID do bot no estado
     await state.update_data(bot_id=bot_id)
     
     # Solicita o novo token
     keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(types.InlineKeyboardButton(text="🔙 Cancelar", callback_data=f"select_bot:{bot_id}"))
+    keyboard.add(types.InlineKeyboardButton(text="🔙 Cancelar", callback_data=user_bot_cb.new(action="select", id=bot_id)))
     
     await callback_query.message.edit_text(
         "🔄 <b>Atualizar Token</b>\n\n"
@@ -247,9 +224,9 @@ async def update_token_callback(callback_query: types.CallbackQuery, state: FSMC
     
     await callback_query.answer()
 
-async def delete_bot_callback(callback_query: types.CallbackQuery, state: FSMContext):
+async def delete_bot_callback(callback_query: types.CallbackQuery, state: FSMContext, callback_data: dict):
     """Handler para confirmar exclusão de um bot"""
-    bot_id = callback_query.data.split(':')[1]
+    bot_id = callback_data["id"]
     
     # Guarda o ID do bot no estado
     await state.update_data(bot_id=bot_id)
@@ -257,8 +234,8 @@ async def delete_bot_callback(callback_query: types.CallbackQuery, state: FSMCon
     # Solicita confirmação
     keyboard = types.InlineKeyboardMarkup(row_width=2)
     keyboard.add(
-        types.InlineKeyboardButton(text="✅ Sim, excluir", callback_data=f"confirm_delete:{bot_id}"),
-        types.InlineKeyboardButton(text="❌ Cancelar", callback_data=f"select_bot:{bot_id}")
+        types.InlineKeyboardButton(text="✅ Sim, excluir", callback_data=user_bot_cb.new(action="confirm_delete", id=bot_id)),
+        types.InlineKeyboardButton(text="❌ Cancelar", callback_data=user_bot_cb.new(action="select", id=bot_id))
     )
     
     await callback_query.message.edit_text(
@@ -272,28 +249,19 @@ async def delete_bot_callback(callback_query: types.CallbackQuery, state: FSMCon
     
     await callback_query.answer()
 
-async def confirm_delete_bot_callback(callback_query: types.CallbackQuery, bot_manager: BotManager):
+async def confirm_delete_bot_callback(callback_query: types.CallbackQuery, state: FSMContext, callback_data: dict, bot_manager: BotManager):
     """Handler para confirmar exclusão de um bot"""
-    bot_id = callback_query.data.split(':')[1]
+    bot_id = callback_data["id"]
     user_id = callback_query.from_user.id
     
-    # Obtém dados do bot
-    bot_data = await bot_manager.get_user_bot(bot_id)
+    # Exclui o bot, conferindo o dono na mesma operação
+    success = await bot_manager.delete_user_bot(bot_id, user_id)
     
-    if bot_data and str(bot_data.get("user_id")) == str(user_id):
-        # Exclui o bot
-        success = await bot_manager.delete_user_bot(bot_id)
+    if success:
+        await callback_query.answer("✅ Bot excluído com sucesso!", show_alert=True)
         
-        if success:
-            await callback_query.answer("✅ Bot excluído com sucesso!", show_alert=True)
-            
-            # Volta para a lista de bots
-            await my_bots_callback(callback_query, None, bot_manager)
-        else:
-            await callback_query.answer("❌ Erro ao excluir o bot.", show_alert=True)
-            
-            # Volta para a seleção do bot
-            await select_bot_callback(callback_query, None, bot_manager)
+        # Volta para a lista de bots (o callback já foi respondido)
+        await show_user_bots(callback_query, bot_manager)
     else:
         await callback_query.answer("❌ Bot não encontrado.", show_alert=True)
 
@@ -302,20 +270,10 @@ async def back_to_menu_callback(callback_query: types.CallbackQuery, state: FSMC
     # Reseta o estado
     await state.finish()
     
-    # Cria teclado com opções principais
-    keyboard = types.InlineKeyboardMarkup(row_width=2)
-    keyboard.add(
-        types.InlineKeyboardButton(text="🤖 Criar seu Bot", callback_data="create_bot"),
-        types.InlineKeyboardButton(text="📝 Meus bots", callback_data="my_bots"),
-    )
-    keyboard.add(
-        types.InlineKeyboardButton(text="ℹ️ Como funciona", callback_data="how_it_works")
-    )
-    
     # Edita a mensagem com o menu principal
     await callback_query.message.edit_text(
         DEFAULT_MESSAGES["bot_description"],
-        reply_markup=keyboard
+        reply_markup=MAIN_MENU_KEYBOARD
     )
     
     await callback_query.answer()
@@ -326,75 +284,67 @@ async def back_to_bots_callback(callback_query: types.CallbackQuery, state: FSMC
 
 def register_user_handlers(dp: Dispatcher, bot: Bot, bot_manager: BotManager, db: Database):
     """Registra os handlers para usuários"""
-    # Callback handlers
-    dp.register_callback_query_handler(
-        how_it_works_callback,
-        lambda c: c.data == "how_it_works",
-        state="*"
-    )
-    
-    dp.register_callback_query_handler(
-        create_bot_callback,
-        lambda c: c.data == "create_bot",
-        state="*"
-    )
-    
-    dp.register_callback_query_handler(
-        lambda c, s: my_bots_callback(c, s, bot_manager),
-        lambda c: c.data == "my_bots",
-        state="*"
-    )
-    
-    dp.register_callback_query_handler(
-        lambda c, s: select_bot_callback(c, s, bot_manager),
-        lambda c: c.data.startswith("select_bot:"),
-        state="*"
-    )
-    
-    dp.register_callback_query_handler(
-        lambda c: pause_bot_callback(c, bot_manager),
-        lambda c: c.data.startswith("pause_bot:"),
-        state="*"
-    )
-    
-    dp.register_callback_query_handler(
-        lambda c: resume_bot_callback(c, bot_manager),
-        lambda c: c.data.startswith("resume_bot:"),
-        state="*"
-    )
-    
-    dp.register_callback_query_handler(
-        update_token_callback,
-        lambda c: c.data.startswith("update_token:"),
-        state="*"
-    )
-    
-    dp.register_callback_query_handler(
-        delete_bot_callback,
-        lambda c: c.data.startswith("delete_bot:"),
-        state="*"
-    )
-    
-    dp.register_callback_query_handler(
-        lambda c: confirm_delete_bot_callback(c, bot_manager),
-        lambda c: c.data.startswith("confirm_delete:"),
-        state="*"
-    )
-    
-    dp.register_callback_query_handler(
-        back_to_menu_callback,
-        lambda c: c.data == "back_to_menu",
-        state="*"
-    )
+    # Callbacks identificados pelo texto completo
+    exact_routes = {
+        "how_it_works": how_it_works_callback,
+        "create_bot": create_bot_callback,
+        "my_bots": partial(my_bots_callback, bot_manager=bot_manager),
+        "back_to_menu": back_to_menu_callback,
+        "back_to_bots": partial(back_to_bots_callback, bot_manager=bot_manager),
+    }
+    
+    # Callbacks de user_bot_cb, identificados pela ação (já decodificada pelo filtro)
+    bot_routes = {
+        "select": partial(select_bot_callback, bot_manager=bot_manager),
+        "pause": partial(pause_bot_callback, bot_manager=bot_manager),
+        "resume": partial(resume_bot_callback, bot_manager=bot_manager),
+        "update_token": update_token_callback,
+        "delete": delete_bot_callback,
+        "confirm_delete": partial(confirm_delete_bot_callback, bot_manager=bot_manager),
+    }
+    
+    # Formato antigo (<prefixo>:<id>) dos botões que ainda estão nos chats -> ação de user_bot_cb
+    legacy_bot_actions = {
+        "select_bot": "select",
+        "pause_bot": "pause",
+        "resume_bot": "resume",
+        "update_token": "update_token",
+        "delete_bot": "delete",
+        "confirm_delete": "confirm_delete",
+    }
+    
+    def match_route(callback_query: types.CallbackQuery):
+        """Resolve o handler do callback com uma única consulta ao dicionário"""
+        route = exact_routes.get(callback_query.data)
+        return {"route": route} if route else False
+    
+    def match_legacy_bot_route(callback_query: types.CallbackQuery):
+        """Converte os botões no formato antigo para os dados de user_bot_cb"""
+        prefix, sep, bot_id = callback_query.data.partition(":")
+        action = legacy_bot_actions.get(prefix)
+        if not sep or not action or not bot_id:
+            return False
+        return {"callback_data": {"@": user_bot_cb.prefix, "action": action, "id": bot_id}}
+    
+    async def route_callback(callback_query: types.CallbackQuery, state: FSMContext, route):
+        """Encaminha o callback para o handler resolvido pelo filtro"""
+        await route(callback_query, state)
+    
+    async def route_bot_callback(callback_query: types.CallbackQuery, state: FSMContext, callback_data: dict):
+        """Encaminha o callback de um bot para o handler da ação"""
+        await bot_routes[callback_data["action"]](callback_query, state, callback_data)
     
+    # Callback handlers
+    dp.register_callback_query_handler(route_callback, match_route, state="*")
     dp.register_callback_query_handler(
-        lambda c, s: back_to_bots_callback(c, s, bot_manager),
-        lambda c: c.data == "back_to_bots",
+        route_bot_callback,
+        user_bot_cb.filter(action=list(bot_routes)),
         state="*"
     )
+    dp.register_callback_query_handler(route_bot_callback, match_legacy_bot_route, state="*")
     
     # Message handlers
     dp.register_message_handler(
-        lambda m, s: token_message(m, s, bot_manager),
+        partial(token_message, bot_manager=bot_manager),
         state=BotCreationStates.waiting_token
     )
\ No newline at end of file
@@ -11,7 +11,7 @@ from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import State, StatesGroup
 
 from core.database import Database
-from core.utils import is_user_in_channel
+from core.utils import is_user_in_channel, MAIN_MENU_KEYBOARD
 from config.settings import CHANNEL_ID, CHANNEL_LINK, CHANNEL_USERNAME
 from config.constants import DEFAULT_MESSAGES, States
 
@@ -23,18 +23,16 @@ class VerificationStates(StatesGroup):
 async def start_command(message: types.Message, state: FSMContext, db: Database):
     """Handler para o comando /start"""
     user_id = message.from_user.id
-    user_data = await db.get_user(user_id)
     
-    # Se o usuário não existir, cria um novo registro
-    if not user_data:
-        user_data = {
-            "id": user_id,
-            "username": message.from_user.username,
-            "first_name": message.from_user.first_name,
-            "last_name": message.from_user.last_name,
-            "in_channel": False
-        }
-        await db.save_user(user_id, user_data)
+    # Obtém o usuário ou cria um novo registro; quem volta a falar com o bot
+    # também volta a receber broadcasts
+    user_data = await db.get_or_create_user(user_id, {
+        "id": user_id,
+        "username": message.from_user.username,
+        "first_name": message.from_user.first_name,
+        "last_name": message.from_user.last_name,
+        "in_channel": False
+    })
     
     # Se o usuário já está verificado, mostra menu principal
     if user_data.get("in_channel", False):
@@ -87,20 +85,10 @@ async def show_main_menu(message: types.Message, state: FSMContext):
     # Reseta o estado
     await state.finish()
     
-    # Cria teclado com opções principais
-    keyboard = types.InlineKeyboardMarkup(row_width=2)
-    keyboard.add(
-        types.InlineKeyboardButton(text="🤖 Criar seu Bot", callback_data="create_bot"),
-        types.InlineKeyboardButton(text="📝 Meus bots", callback_data="my_bots"),
-    )
-    keyboard.add(
-        types.InlineKeyboardButton(text="ℹ️ Como funciona", callback_data="how_it_works")
-    )
-    
     # Envia mensagem com menu
     await message.answer(
         DEFAULT_MESSAGES["bot_description"],
-        reply_markup=keyboard
+        reply_markup=MAIN_MENU_KEYBOARD
     )
 
 def register_verification_handlers(dp: Dispatcher, bot: Bot, db: Database):
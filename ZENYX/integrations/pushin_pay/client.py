@@ -1,55 +1,148 @@
 # integrations/pushin_pay/client.py
-import requests
+import aiohttp
+import asyncio
 import logging
+import orjson
 import os
+import random
+import re
+import uuid
 from typing import Dict, Any, Optional
 
+from config.settings import PUSHINPAY_TOKEN, PUSHINPAY_API_URL, PUSHINPAY_MAX_INFLIGHT
+
+# Limites do pool de conexões HTTP com a Pushin Pay
+PUSHINPAY_CONNECTIONS_PER_HOST = 20
+PUSHINPAY_KEEPALIVE_TIMEOUT = 75
+PUSHINPAY_REQUEST_TIMEOUT = 30
+
+# Novas tentativas em falhas transitórias (backoff exponencial com jitter)
+PUSHINPAY_RETRY_ATTEMPTS = 3
+PUSHINPAY_RETRY_INITIAL_DELAY = 0.2
+PUSHINPAY_RETRY_MAX_DELAY = 2.0
+_RETRYABLE_STATUSES = frozenset({502, 503, 504})
+
+# Formato aceito para cada tipo de chave PIX (compilados uma única vez)
+_PIX_KEY_PATTERNS = {
+    "evp": re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"),
+    "national_registration": re.compile(r"\d{11}|\d{14}"),
+    "phone": re.compile(r"\+?\d{10,13}"),
+    "email": re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+"),
+}
+_VALID_PIX_KEY_TYPES = frozenset(_PIX_KEY_PATTERNS)
+
+def new_idempotency_key() -> str:
+    """Gera uma chave de idempotência para operações que movimentam dinheiro"""
+    return str(uuid.uuid4())
+
+class AsyncPushinPayClient:
+    """Sessão HTTP compartilhada com a API da Pushin Pay (keep-alive e pool de conexões)"""
+    
+    def __init__(self, max_inflight: int = PUSHINPAY_MAX_INFLIGHT):
+        self.max_inflight = max_inflight
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Retorna a sessão HTTP compartilhada, criando-a se necessário"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=PUSHINPAY_REQUEST_TIMEOUT),
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=PUSHINPAY_CONNECTIONS_PER_HOST,
+                    keepalive_timeout=PUSHINPAY_KEEPALIVE_TIMEOUT,
+                    enable_cleanup_closed=True
+                )
+            )
+        return self._session
+    
+    async def start(self):
+        """Abre a sessão HTTP compartilhada"""
+        self._get_session()
+    
+    async def request(self, method: str, url: str, token: str, data: Optional[Dict] = None,
+                      idempotency_key: Optional[str] = None) -> Dict:
+        """Realiza uma requisição autenticada reaproveitando as conexões abertas"""
+        session = self._get_session()
+        headers = {"Authorization": f"Bearer {token}"}
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+        
+        # Serializa o corpo direto para bytes com orjson (o Content-Type já vem da sessão)
+        body = orjson.dumps(data) if data is not None else None
+        
+        # Limita o número de requisições simultâneas para não sobrecarregar a API
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_inflight)
+        
+        # Só repete consultas ou escritas protegidas por chave de idempotência
+        attempts = PUSHINPAY_RETRY_ATTEMPTS if method == "GET" or idempotency_key else 1
+        
+        for attempt in range(1, attempts + 1):
+            try:
+                async with self._semaphore:
+                    async with session.request(method=method, url=url, headers=headers, data=body) as response:
+                        if response.status not in _RETRYABLE_STATUSES or attempt == attempts:
+                            if response.status >= 400:
+                                logging.error("Resposta: %s", await response.text())
+                            response.raise_for_status()
+                            return await response.json(loads=orjson.loads, content_type=None)
+                        
+                        logging.warning("Pushin Pay respondeu %s, tentativa %s de %s", response.status, attempt, attempts)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                # Escritas só são repetidas se a conexão falhou antes do envio; após um
+                # timeout ou desconexão a operação pode já ter sido processada
+                if attempt == attempts or (method != "GET" and not isinstance(e, aiohttp.ClientConnectorError)):
+                    raise
+                logging.warning("Falha de conexão com a Pushin Pay (%s), tentativa %s de %s", e, attempt, attempts)
+            
+            # Espera fora do semáforo para não segurar a vaga durante o backoff
+            delay = min(PUSHINPAY_RETRY_MAX_DELAY, PUSHINPAY_RETRY_INITIAL_DELAY * 2 ** (attempt - 1))
+            await asyncio.sleep(delay + random.uniform(0, delay))
+    
+    async def close(self):
+        """Fecha a sessão HTTP compartilhada"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+# Instância única compartilhada por todas as integrações
+pushin_pay_http = AsyncPushinPayClient()
+
 class PushinPayClient:
-    """Cliente para a API da Pushin Pay"""
+    """Cliente para a API da Pushin Pay (por padrão usa o token e a URL da plataforma)"""
     
-    def __init__(self, token: str, base_url: str):
-        self.token = token
-        self.base_url = base_url
-        self.headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
+    def __init__(self, token: Optional[str] = None, base_url: Optional[str] = None):
+        self.token = token or PUSHINPAY_TOKEN
+        self.base_url = base_url or PUSHINPAY_API_URL
     
-    def _request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict:
+    async def _request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                       idempotency_key: Optional[str] = None) -> Dict:
         """Realiza uma requisição para a API"""
         url = f"{self.base_url}{endpoint}"
         
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=self.headers,
-                json=data
-            )
-            
-            response.raise_for_status()
-            return response.json()
+            return await pushin_pay_http.request(method, url, self.token, data, idempotency_key)
         
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Erro na requisição para Pushin Pay: {e}")
-            if hasattr(e, 'response') and e.response:
-                logging.error(f"Resposta: {e.response.text}")
+        except aiohttp.ClientError as e:
+            logging.error("Erro na requisição para Pushin Pay: %s", e)
             raise
     
-    def create_pix_qrcode(self, value: int, webhook_url: Optional[str] = None) -> Dict:
+    async def create_pix_qrcode(self, value: int, webhook_url: Optional[str] = None) -> Dict:
         """Cria um QRCode PIX para pagamento"""
         data = {"value": value}
         
         if webhook_url:
             data["webhook_url"] = webhook_url
             
-        return self._request("POST", "/pix/cashIn", data)
+        return await self._request("POST", "/pix/cashIn", data, new_idempotency_key())
     
-    def check_transaction_status(self, transaction_id: str) -> Dict:
+    async def check_transaction_status(self, transaction_id: str) -> Dict:
         """Consulta o status de uma transação"""
-        return self._request("GET", f"/transactions/{transaction_id}")
+        return await self._request("GET", f"/transactions/{transaction_id}")
     
-    def make_pix_transfer(self, value: int, pix_key_type: str, pix_key: str, webhook_url: Optional[str] = None) -> Dict:
+    async def make_pix_transfer(self, value: int, pix_key_type: str, pix_key: str, webhook_url: Optional[str] = None) -> Dict:
         """Realiza uma transferência PIX"""
         data = {
             "value": value,
@@ -60,12 +153,29 @@ class PushinPayClient:
         if webhook_url:
             data["webhook_url"] = webhook_url
             
-        return self._request("POST", "/pix/cashOut", data)
+        return await self._request("POST", "/pix/cashOut", data, new_idempotency_key())
     
-    def check_transfer_status(self, transfer_id: str) -> Dict:
+    async def check_transfer_status(self, transfer_id: str) -> Dict:
         """Consulta o status de uma transferência"""
-        return self._request("GET", f"/transfers/{transfer_id}")
+        return await self._request("GET", f"/transfers/{transfer_id}")
     
-    def refund_transaction(self, transaction_id: str) -> Dict:
+    async def refund_transaction(self, transaction_id: str) -> Dict:
         """Realiza o estorno de uma transação"""
-        return self._request("POST", f"/transactions/{transaction_id}/refund")
\ No newline at end of file
+        return await self._request("POST", f"/transactions/{transaction_id}/refund")
+    
+    @staticmethod
+    def validate_pix_key(pix_key: str, pix_key_type: str) -> bool:
+        """Valida a chave PIX e o tipo (evp, national_registration, phone, email)"""
+        if pix_key_type not in _VALID_PIX_KEY_TYPES:
+            logging.error("Tipo de chave PIX inválido: %s", pix_key_type)
+            return False
+        
+        if not pix_key:
+            logging.error("Chave PIX não pode ser vazia.")
+            return False
+        
+        if not _PIX_KEY_PATTERNS[pix_key_type].fullmatch(pix_key):
+            logging.error("Chave PIX em formato inválido para o tipo %s", pix_key_type)
+            return False
+        
+        return True
\ No newline at end of file
@@ -10,29 +10,29 @@ acesso ao canal oficial.
 import asyncio
 import logging
 import os
-from aiogram import Bot, Dispatcher, types
-from aiogram.contrib.fsm_storage.redis import RedisStorage2
+from aiogram import Dispatcher, types
 from aiogram.utils import executor
 from dotenv import load_dotenv
 
-from config.settings import get_redis_url
-from core.database import Database
+from config.settings import ADMIN_IDS
+from core.database import Database, get_fsm_storage
 from core.bot_manager import BotManager
+from core.telegram_session import SharedSessionBot, close_telegram_session
 from handlers.verification_handlers import register_verification_handlers
 from handlers.user_handlers import register_user_handlers
 from handlers.admin_handlers import register_admin_handlers
+from integrations.pushin_pay.client import pushin_pay_http
 
 # Carrega variáveis de ambiente
 load_dotenv()
 BOT_TOKEN = os.getenv('BOT_TOKEN')
-ADMIN_IDS = list(map(int, os.getenv('ADMIN_IDS', '').split(',')))
 
 # Configuração de logs
 logger = logging.getLogger(__name__)
 
 # Inicializa o bot e o dispatcher
-bot = Bot(token=BOT_TOKEN)
-storage = RedisStorage2(url=get_redis_url())
+bot = SharedSessionBot(token=BOT_TOKEN)
+storage = get_fsm_storage()
 dp = Dispatcher(bot, storage=storage)
 
 # Inicializa gerenciador de banco de dados
@@ -41,31 +41,47 @@ db = Database()
 # Inicializa gerenciador de bots
 bot_manager = BotManager(bot, db)
 
+async def notify_admin(admin_id: int, text: str):
+    """Envia uma notificação a um administrador, registrando falhas"""
+    try:
+        await bot.send_message(admin_id, text)
+    except Exception as e:
+        logger.error(f"Não foi possível notificar o administrador {admin_id}: {e}")
+
 async def on_startup(dp):
     """Ações executadas ao iniciar o bot"""
     logger.info("Bot gerenciador iniciado")
     
+    # Abre a sessão HTTP compartilhada com a PushinPay
+    await pushin_pay_http.start()
+    
     # Registra os handlers
     register_verification_handlers(dp, bot, db)
     register_user_handlers(dp, bot, bot_manager, db)
     register_admin_handlers(dp, bot, bot_manager, db)
     
-    # Notifica administradores
-    for admin_id in ADMIN_IDS:
-        try:
-            await bot.send_message(admin_id, "🚀 Bot gerenciador iniciado com sucesso!")
-        except Exception as e:
-            logger.error(f"Não foi possível notificar o administrador {admin_id}: {e}")
+    # Notifica os administradores em paralelo
+    await asyncio.gather(
+        *(notify_admin(admin_id, "🚀 Bot gerenciador iniciado com sucesso!") for admin_id in ADMIN_IDS),
+        return_exceptions=True
+    )
 
 async def on_shutdown(dp):
     """Ações executadas ao desligar o bot"""
     logger.info("Desligando bot gerenciador")
-    await bot.close()
+    await pushin_pay_http.close()
+    await close_telegram_session()
     await storage.close()
+    await storage.wait_closed()
 
 async def run_main_bot():
     """Inicia o bot gerenciador"""
-    await dp.start_polling(on_startup=on_startup, on_shutdown=on_shutdown)
+    # Dispatcher.start_polling não aceita hooks de início/fim; chama-os aqui
+    await on_startup(dp)
+    try:
+        await dp.start_polling()
+    finally:
+        await on_shutdown(dp)
 
 if __name__ == "__main__":
     asyncio.run(run_main_bot())
\ No newline at end of file
@@ -13,6 +13,8 @@ class Message:
     Representa uma mensagem personalizada para um bot.
     """
 
+    __slots__ = ("user_id", "bot_id", "content", "message_type", "created_at", "is_active")
+
     def __init__(
         self,
         user_id: str,
@@ -13,6 +13,8 @@ class Payment:
     Representa um pagamento feito por um usuário para um plano de bot.
     """
 
+    __slots__ = ("user_id", "plan_id", "amount", "method", "status", "transaction_id", "created_at")
+
     def __init__(
         self,
         user_id: str,
@@ -13,6 +13,8 @@ class Plan:
     Representa um plano de assinatura ou funcionalidade de um bot.
     """
 
+    __slots__ = ("name", "price", "duration_days", "features", "owner_id", "created_at", "is_active")
+
     def __init__(
         self,
         name: str,
@@ -1,18 +1,38 @@
 # models/user.py
 from typing import Dict, Any, List, Optional
-import json
+import orjson
 import time
 
+# Quantidade de chaves buscadas por MGET
+_MGET_BATCH_SIZE = 512
+
+# Chaves do Redis usadas pelo modelo (esquema centralizado aqui)
+_INDEX_KEY = "users:index"
+_INDEX_BUILT_KEY = "users:index_built"
+
+def _key(user_id) -> str:
+    """Chave do registro de um usuário"""
+    return f"user:{user_id}"
+
 class User:
     """Modelo para usuários do sistema"""
     
-    def __init__(self, user_id: int, username: Optional[str] = None, first_name: Optional[str] = None):
-        self.user_id = user_id
-        self.username = username
-        self.first_name = first_name
-        self.is_verified = False
-        self.bots = []  # Lista de IDs de bots do usuário
-        self.created_at = int(time.time())
+    __slots__ = ("user_id", "username", "first_name", "is_verified", "bots", "created_at")
+    
+    def __init__(
+        self,
+        user_id: int,
+        username: Optional[str] = None,
+        first_name: Optional[str] = None,
+        created_at: Optional[int] = None
+    ):
+        self.user_id: int = user_id
+        self.username: Optional[str] = username
+        self.first_name: Optional[str] = first_name
+        self.is_verified: bool = False
+        self.bots: List[str] = []  # Lista de IDs de bots do usuário
+        # O relógio só é consultado para registros novos
+        self.created_at: int = created_at if created_at is not None else int(time.time())
         
     def to_dict(self) -> Dict[str, Any]:
         """Converte o usuário para dicionário"""
@@ -31,37 +51,59 @@ class User:
         user = cls(
             user_id=data["user_id"],
             username=data.get("username"),
-            first_name=data.get("first_name")
+            first_name=data.get("first_name"),
+            created_at=data.get("created_at")
         )
         user.is_verified = data.get("is_verified", False)
         user.bots = data.get("bots", [])
-        user.created_at = data.get("created_at", int(time.time()))
         return user
     
     @classmethod
     async def get(cls, redis_conn, user_id: int) -> Optional['User']:
         """Obtém um usuário do Redis"""
-        user_data = await redis_conn.get(f"user:{user_id}")
+        user_data = await redis_conn.get(_key(user_id))
         
         if not user_data:
             return None
             
-        return cls.from_dict(json.loads(user_data))
+        return cls.from_dict(orjson.loads(user_data))
     
     async def save(self, redis_conn) -> None:
         """Salva o usuário no Redis"""
-        await redis_conn.set(f"user:{self.user_id}", json.dumps(self.to_dict()))
+        async with redis_conn.pipeline(transaction=True) as pipe:
+            pipe.set(_key(self.user_id), orjson.dumps(self.to_dict()))
+            pipe.sadd(_INDEX_KEY, self.user_id)
+            await pipe.execute()
+    
+    @classmethod
+    async def ensure_index(cls, redis_conn) -> None:
+        """Preenche o índice de usuários a partir das chaves já existentes (executa uma única vez)"""
+        if await redis_conn.exists(_INDEX_BUILT_KEY):
+            return
+        
+        ids = []
+        async for key in redis_conn.scan_iter(match="user:*", count=500, _type="string"):
+            item_id = key.split(":", 1)[1]
+            if ":" not in item_id:
+                ids.append(item_id)
+        
+        async with redis_conn.pipeline(transaction=True) as pipe:
+            if ids:
+                pipe.sadd(_INDEX_KEY, *ids)
+            pipe.set(_INDEX_BUILT_KEY, 1)
+            await pipe.execute()
     
     @classmethod
     async def get_all(cls, redis_conn) -> List['User']:
         """Obtém todos os usuários do Redis"""
-        user_keys = await redis_conn.keys("user:*")
+        await cls.ensure_index(redis_conn)
+        
+        # O índice contém apenas IDs de usuários, sem varrer o restante das chaves
+        ids = list(await redis_conn.smembers(_INDEX_KEY))
         users = []
         
-        for key in user_keys:
-            user_data = await redis_conn.get(key)
-            
-            if user_data:
-                users.append(cls.from_dict(json.loads(user_data)))
+        for start in range(0, len(ids), _MGET_BATCH_SIZE):
+            values = await redis_conn.mget([_key(user_id) for user_id in ids[start:start + _MGET_BATCH_SIZE]])
+            users.extend(cls.from_dict(orjson.loads(value)) for value in values if value)
                 
         return users
\ No newline at end of file
@@ -1,25 +1,48 @@
 # models/user_bot.py
 from typing import Dict, Any, List, Optional
-import json
+import orjson
 import time
 
+# Quantidade de chaves buscadas por MGET
+_MGET_BATCH_SIZE = 512
+
+# Chaves do Redis usadas pelo modelo (esquema centralizado aqui)
+_INDEX_KEY = "bots:index"
+_INDEX_BUILT_KEY = "bots:index_built"
+
+def _key(bot_id) -> str:
+    """Chave do registro de um bot"""
+    return f"bot:{bot_id}"
+
+def _user_bots_key(user_id) -> str:
+    """Chave do conjunto de bots de um usuário"""
+    return f"user:{user_id}:bots"
+
 class UserBot:
     """Modelo para bots de usuários"""
     
-    def __init__(self, bot_id: str, user_id: int, token: str, username: str):
-        self.bot_id = bot_id
-        self.user_id = user_id
-        self.token = token
-        self.username = username
-        self.active = True
-        self.created_at = int(time.time())
-        self.channel_id = None
-        self.pushin_token = None
-        self.welcome_messages = []
-        self.plans = []
-        self.upsell = None
-        self.order_bump = None
-        self.support_username = None
+    __slots__ = (
+        "bot_id", "user_id", "token", "username", "active", "created_at", "channel_id",
+        "pushin_token", "welcome_messages", "plans", "upsell", "order_bump", "support_username",
+        "_snapshot"
+    )
+    
+    def __init__(self, bot_id: str, user_id: int, token: str, username: str, created_at: Optional[int] = None):
+        self.bot_id: str = bot_id
+        self.user_id: int = user_id
+        self.token: str = token
+        self.username: str = username
+        self.active: bool = True
+        # O relógio só é consultado para registros novos
+        self.created_at: int = created_at if created_at is not None else int(time.time())
+        self.channel_id: Optional[int] = None
+        self.pushin_token: Optional[str] = None
+        self.welcome_messages: List[Dict[str, Any]] = []
+        self.plans: List[Dict[str, Any]] = []
+        self.upsell: Optional[Dict[str, Any]] = None
+        self.order_bump: Optional[Dict[str, Any]] = None
+        self.support_username: Optional[str] = None
+        self._snapshot: Optional[bytes] = None  # JSON gravado no Redis na última leitura/escrita
         
     def to_dict(self) -> Dict[str, Any]:
         """Converte o bot para dicionário"""
@@ -46,10 +69,10 @@ class UserBot:
             bot_id=data["bot_id"],
             user_id=data["user_id"],
             token=data["token"],
-            username=data["username"]
+            username=data["username"],
+            created_at=data.get("created_at")
         )
         bot.active = data.get("active", True)
-        bot.created_at = data.get("created_at", int(time.time()))
         bot.channel_id = data.get("channel_id")
         bot.pushin_token = data.get("pushin_token")
         bot.welcome_messages = data.get("welcome_messages", [])
@@ -62,54 +85,101 @@ class UserBot:
     @classmethod
     async def get(cls, redis_conn, bot_id: str) -> Optional['UserBot']:
         """Obtém um bot do Redis"""
-        bot_data = await redis_conn.get(f"bot:{bot_id}")
+        bot_data = await redis_conn.get(_key(bot_id))
         
         if not bot_data:
             return None
             
-        return cls.from_dict(json.loads(bot_data))
+        bot = cls.from_dict(orjson.loads(bot_data))
+        bot._snapshot = bot_data.encode() if isinstance(bot_data, str) else bot_data
+        return bot
     
     async def save(self, redis_conn) -> None:
         """Salva o bot no Redis"""
-        # Salva o bot
-        await redis_conn.set(f"bot:{self.bot_id}", json.dumps(self.to_dict()))
+        # Serializa direto dos atributos, sem passar pelo dicionário de to_dict (mesmos campos)
+        payload = orjson.dumps({
+            "bot_id": self.bot_id,
+            "user_id": self.user_id,
+            "token": self.token,
+            "username": self.username,
+            "active": self.active,
+            "created_at": self.created_at,
+            "channel_id": self.channel_id,
+            "pushin_token": self.pushin_token,
+            "welcome_messages": self.welcome_messages,
+            "plans": self.plans,
+            "upsell": self.upsell,
+            "order_bump": self.order_bump,
+            "support_username": self.support_username
+        })
         
-        # Adiciona à lista de bots do usuário
-        await redis_conn.sadd(f"user:{self.user_id}:bots", self.bot_id)
+        # Nada mudou desde a leitura: o documento e os índices já estão no Redis
+        if payload == self._snapshot:
+            return
         
-        # Atualiza o contador de bots
-        await redis_conn.incr("bot_counter", 0)
+        # Grava o bot e os índices em uma única transação (o contador já é incrementado em generate_id)
+        async with redis_conn.pipeline(transaction=True) as pipe:
+            # Salva o bot
+            pipe.set(_key(self.bot_id), payload)
+            
+            # Adiciona à lista de bots do usuário
+            pipe.sadd(_user_bots_key(self.user_id), self.bot_id)
+            
+            # Registra no índice de bots
+            pipe.sadd(_INDEX_KEY, self.bot_id)
+            
+            await pipe.execute()
+        
+        self._snapshot = payload
+    
+    @classmethod
+    async def ensure_index(cls, redis_conn) -> None:
+        """Preenche o índice de bots a partir das chaves já existentes (executa uma única vez)"""
+        if await redis_conn.exists(_INDEX_BUILT_KEY):
+            return
+        
+        ids = []
+        async for key in redis_conn.scan_iter(match="bot:*", count=500, _type="string"):
+            item_id = key.split(":", 1)[1]
+            if ":" not in item_id:
+                ids.append(item_id)
+        
+        async with redis_conn.pipeline(transaction=True) as pipe:
+            if ids:
+                pipe.sadd(_INDEX_KEY, *ids)
+            pipe.set(_INDEX_BUILT_KEY, 1)
+            await pipe.execute()
     
     @classmethod
     async def get_all(cls, redis_conn) -> List['UserBot']:
         """Obtém todos os bots do Redis"""
-        bot_keys = await redis_conn.keys("bot:*")
+        await cls.ensure_index(redis_conn)
+        
+        # O índice contém apenas IDs de bots, sem varrer o restante das chaves
+        ids = list(await redis_conn.smembers(_INDEX_KEY))
         bots = []
         
-        for key in bot_keys:
-            bot_data = await redis_conn.get(key)
-            
-            if bot_data:
-                bots.append(cls.from_dict(json.loads(bot_data)))
+        for start in range(0, len(ids), _MGET_BATCH_SIZE):
+            values = await redis_conn.mget([_key(bot_id) for bot_id in ids[start:start + _MGET_BATCH_SIZE]])
+            bots.extend(cls.from_dict(orjson.loads(value)) for value in values if value)
                 
         return bots
     
     @classmethod
     async def get_by_user(cls, redis_conn, user_id: int) -> List['UserBot']:
         """Obtém todos os bots de um usuário"""
-        bot_ids = await redis_conn.smembers(f"user:{user_id}:bots")
-        bots = []
+        bot_ids = await redis_conn.smembers(_user_bots_key(user_id))
         
-        for bot_id in bot_ids:
-            bot_data = await redis_conn.get(f"bot:{bot_id}")
-            
-            if bot_data:
-                bots.append(cls.from_dict(json.loads(bot_data)))
-                
-        return bots
+        if not bot_ids:
+            return []
+        
+        # Busca todos os bots do usuário em uma única ida ao Redis
+        values = await redis_conn.mget([_key(bot_id) for bot_id in bot_ids])
+        return [cls.from_dict(orjson.loads(value)) for value in values if value]
     
     @classmethod
     async def generate_id(cls, redis_conn) -> str:
         """Gera um ID único para o bot"""
         counter = await redis_conn.incr("bot_counter")
-        return f"{counter:02d}"  # Formato: 01, 02, 03, etc.
\ No newline at end of file
+        # Sem zeros à esquerda: o contador nunca se repete, então IDs antigos (01, 02...) continuam válidos
+        return str(counter)
\ No newline at end of file
@@ -11,6 +11,14 @@ import logging
 import os
 from dotenv import load_dotenv
 
+# Usa o uvloop como loop de eventos quando disponível (Linux/macOS); sem ele,
+# segue com o loop padrão do asyncio
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
 # Configuração de logs
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -45,19 +53,14 @@ async def start_user_bots():
 async def main():
     """Função principal que executa ambos os bots em paralelo"""
     logger.info("Iniciando sistema Zenyx VIPs...")
-    tasks = [
-        asyncio.create_task(start_main_bot()),
-        asyncio.create_task(start_user_bots())
-    ]
     
-    # Executa ambas as tarefas simultaneamente
-    await asyncio.gather(*tasks)
+    # Executa ambos os bots simultaneamente
+    await asyncio.gather(start_main_bot(), start_user_bots())
 
 if __name__ == "__main__":
     try:
-        # Configura e inicia o loop de eventos
-        loop = asyncio.get_event_loop()
-        loop.run_until_complete(main())
+        # Cria o loop de eventos e, ao sair, encerra as tasks pendentes e o executor padrão
+        asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Sistema encerrado pelo usuário")
     except Exception as e:
@@ -6,21 +6,26 @@ Handlers para os bots dos usuários
 """
 
 import logging
+import asyncio
+import inspect
+import re
 import time
+from functools import lru_cache
+from typing import Dict, List
 from datetime import datetime
 from aiogram import Bot, Dispatcher, types
-from aiogram.contrib.fsm_storage.redis import RedisStorage2
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import State, StatesGroup
 
-from config.settings import get_redis_url
 from core.database import Database
 from core.bot_manager import UserBot
 from core.utils import (
     is_user_in_channel, 
     build_channel_info_text, 
     get_period_timestamps,
-    format_price
+    format_price,
+    log_error_throttled,
+    edit_menu_message
 )
 from user_bot.message_config import (
     get_welcome_messages,
@@ -57,6 +62,48 @@ from user_bot.support import save_support_config, get_support_config
 
 logger = logging.getLogger(__name__)
 
+# Menu de administração do dono do bot (criado uma única vez)
+_ADMIN_MENU_KEYBOARD = types.InlineKeyboardMarkup(row_width=2)
+_ADMIN_MENU_KEYBOARD.add(
+    types.InlineKeyboardButton(text="📝 Configurar mensagens", callback_data="config_messages"),
+    types.InlineKeyboardButton(text="💰 Integrar Pushin Pay", callback_data="config_pushinpay")
+)
+_ADMIN_MENU_KEYBOARD.add(
+    types.InlineKeyboardButton(text="👥 Adicionar canal/grupo", callback_data="config_chat"),
+    types.InlineKeyboardButton(text="📞 Configurar suporte", callback_data="config_support")
+)
+_ADMIN_MENU_KEYBOARD.add(
+    types.InlineKeyboardButton(text="📊 Métricas de Vendas", callback_data="sales_metrics"),
+    types.InlineKeyboardButton(text="🛍 Adicionar Upsell", callback_data="config_upsell")
+)
+_ADMIN_MENU_KEYBOARD.add(
+    types.InlineKeyboardButton(text="💱 Adicionar Order Bump", callback_data="config_order_bump"),
+    types.InlineKeyboardButton(text="📤 Remarketing", callback_data="config_remarketing")
+)
+_ADMIN_MENU_KEYBOARD.add(
+    types.InlineKeyboardButton(text="🎯 Criar planos", callback_data="config_plans")
+)
+
+# Botão vazio usado para alinhar teclados (apenas leitura)
+_NOOP_BUTTON = types.InlineKeyboardButton(text=" ", callback_data="noop")
+
+# Método de envio de cada tipo de mídia das mensagens configuradas
+_MEDIA_SENDERS = {
+    "photo": "answer_photo",
+    "video": "answer_video",
+    "animation": "answer_animation"
+}
+
+# Formato aceito para o ID de canais/supergrupos (-100 seguido do ID numérico)
+_CHAT_ID_RE = re.compile(r"-100\d{6,13}")
+
+@lru_cache(maxsize=None)
+def _back_keyboard(callback_data: str) -> types.InlineKeyboardMarkup:
+    """Teclado apenas com o botão de voltar (criado uma única vez por destino; não deve ser alterado)"""
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data=callback_data))
+    return keyboard
+
 class BotStates(StatesGroup):
     # Estados para configuração de mensagens
     configuring_messages = State()
@@ -103,39 +150,20 @@ async def start_command(message: types.Message, state: FSMContext, user_bot: Use
     bot_owner_id = user_bot.user_id
     
     # Verifica se é o dono do bot
-    if str(user_id) == str(bot_owner_id):
+    if user_id == bot_owner_id:
         await show_admin_menu(message, user_bot)
         return
     
-    # Para usuários normais, verifica se há mensagens de boas-vindas configuradas
-    welcome_messages = await get_welcome_messages(user_bot)
+    # Para usuários normais, busca mensagens de boas-vindas, planos e order bump em paralelo
+    welcome_messages, plans, order_bump = await asyncio.gather(
+        get_welcome_messages(user_bot),
+        get_plans(user_bot),
+        get_order_bump_config(user_bot)
+    )
     
     if welcome_messages:
         # Envia mensagens de boas-vindas na ordem configurada
-        for msg in welcome_messages:
-            msg_type = msg.get("type", "text")
-            
-            if msg_type == "text":
-                await message.answer(msg.get("text", ""), parse_mode="HTML")
-            elif msg_type == "media" or msg_type == "media_with_text":
-                media_id = msg.get("media_id")
-                caption = msg.get("text", "")
-                
-                if media_id:
-                    try:
-                        # Determina o tipo de mídia
-                        if msg.get("media_type") == "photo":
-                            await message.answer_photo(media_id, caption=caption, parse_mode="HTML")
-                        elif msg.get("media_type") == "video":
-                            await message.answer_video(media_id, caption=caption, parse_mode="HTML")
-                        elif msg.get("media_type") == "animation":
-                            await message.answer_animation(media_id, caption=caption, parse_mode="HTML")
-                        else:
-                            # Fallback para documentos
-                            await message.answer_document(media_id, caption=caption, parse_mode="HTML")
-                    except Exception as e:
-                        logger.error(f"Erro ao enviar mídia: {e}", exc_info=True)
-                        await message.answer(caption, parse_mode="HTML")
+        await send_configured_messages(message, welcome_messages)
     else:
         # Mensagem padrão se não houver mensagens configuradas
         await message.answer(
@@ -143,8 +171,6 @@ async def start_command(message: types.Message, state: FSMContext, user_bot: Use
         )
     
     # Mostra planos disponíveis
-    plans = await get_plans(user_bot)
-    
     if plans:
         # Cria teclado com os planos disponíveis
         keyboard = types.InlineKeyboardMarkup(row_width=2)
@@ -160,7 +186,6 @@ async def start_command(message: types.Message, state: FSMContext, user_bot: Use
             ))
         
         # Verifica se há order bump configurado
-        order_bump = await get_order_bump_config(user_bot)
         if order_bump and order_bump.get("active", False):
             # Adiciona botão de order bump
             keyboard.add(types.InlineKeyboardButton(
@@ -175,6 +200,27 @@ async def start_command(message: types.Message, state: FSMContext, user_bot: Use
             parse_mode="HTML"
         )
 
+async def send_configured_messages(message: types.Message, messages: List[Dict]):
+    """Envia as mensagens configuradas no chat, uma de cada vez para manter a ordem"""
+    for msg in messages:
+        msg_type = msg.get("type", "text")
+        
+        if msg_type == "text":
+            await message.answer(msg.get("text", ""), parse_mode="HTML")
+        elif msg_type == "media" or msg_type == "media_with_text":
+            media_id = msg.get("media_id")
+            caption = msg.get("text", "")
+            
+            if media_id:
+                try:
+                    # Determina o método de envio pelo tipo de mídia (documento como fallback)
+                    send_media = getattr(message, _MEDIA_SENDERS.get(msg.get("media_type"), "answer_document"))
+                    await send_media(media_id, caption=caption, parse_mode="HTML")
+                except Exception as e:
+                    # Traceback completo no máximo uma vez por minuto por tipo de erro
+                    log_error_throttled(logger, f"send_media:{type(e).__name__}", f"Erro ao enviar mídia: {e}")
+                    await message.answer(caption, parse_mode="HTML")
+
 async def show_admin_menu(message: types.Message, user_bot: UserBot):
     """Mostra o menu de administração para o dono do bot"""
     # Obtém o nome de usuário do bot
@@ -186,29 +232,7 @@ async def show_admin_menu(message: types.Message, user_bot: UserBot):
         f"👨‍💼 Você é o administrador deste bot!"
     )
     
-    # Cria teclado com opções de administração
-    keyboard = types.InlineKeyboardMarkup(row_width=2)
-    keyboard.add(
-        types.InlineKeyboardButton(text="📝 Configurar mensagens", callback_data="config_messages"),
-        types.InlineKeyboardButton(text="💰 Integrar Pushin Pay", callback_data="config_pushinpay")
-    )
-    keyboard.add(
-        types.InlineKeyboardButton(text="👥 Adicionar canal/grupo", callback_data="config_chat"),
-        types.InlineKeyboardButton(text="📞 Configurar suporte", callback_data="config_support")
-    )
-    keyboard.add(
-        types.InlineKeyboardButton(text="📊 Métricas de Vendas", callback_data="sales_metrics"),
-        types.InlineKeyboardButton(text="🛍 Adicionar Upsell", callback_data="config_upsell")
-    )
-    keyboard.add(
-        types.InlineKeyboardButton(text="💱 Adicionar Order Bump", callback_data="config_order_bump"),
-        types.InlineKeyboardButton(text="📤 Remarketing", callback_data="config_remarketing")
-    )
-    keyboard.add(
-        types.InlineKeyboardButton(text="🎯 Criar planos", callback_data="config_plans")
-    )
-    
-    await message.answer(text, reply_markup=keyboard)
+    await message.answer(text, reply_markup=_ADMIN_MENU_KEYBOARD)
 
 # Handlers para configuração de mensagens
 
@@ -239,7 +263,7 @@ async def config_messages_callback(callback_query: types.CallbackQuery, user_bot
         types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_admin")
     )
     
-    await callback_query.message.edit_text(text, reply_markup=keyboard)
+    await edit_menu_message(callback_query.message, text, keyboard)
     await callback_query.answer()
 
 async def new_message_callback(callback_query: types.CallbackQuery, state: FSMContext):
@@ -271,7 +295,6 @@ async def new_text_message_callback(callback_query: types.CallbackQuery, state:
     await callback_query.message.edit_text(text, reply_markup=keyboard)
     
     # Define o estado para aguardar o texto
-    await state.update_data(message_type="text")
     await BotStates.waiting_message_text.set()
     
     await callback_query.answer()
@@ -287,57 +310,53 @@ async def new_media_message_callback(callback_query: types.CallbackQuery, state:
     await callback_query.message.edit_text(text, reply_markup=keyboard)
     
     # Define o estado para aguardar a mídia
-    await state.update_data(message_type="media_with_text")
     await BotStates.waiting_message_media.set()
     
     await callback_query.answer()
 
 async def message_text_handler(message: types.Message, state: FSMContext, user_bot: UserBot):
-    """Handler para receber o texto da mensagem"""
-    # Obtém dados do estado
+    """Handler para receber o texto de uma mensagem apenas de texto"""
+    # O tipo da mensagem é definido pelo próprio estado, sem ler dados do FSM
+    message_data = {
+        "type": "text",
+        "text": message.text
+    }
+    
+    await save_message(user_bot, message_data)
+    
+    # Notifica sucesso
+    keyboard = _back_keyboard("config_messages")
+    
+    await message.answer(
+        "✅ Mensagem de texto salva com sucesso!",
+        reply_markup=keyboard
+    )
+    
+    # Reseta o estado
+    await state.finish()
+
+async def message_caption_handler(message: types.Message, state: FSMContext, user_bot: UserBot):
+    """Handler para receber o texto que acompanha a mídia da mensagem"""
+    # Obtém a mídia salva no estado
     data = await state.get_data()
-    message_type = data.get("message_type", "text")
-    
-    if message_type == "media_with_text":
-        # Caso seja um texto para acompanhar mídia
-        media_id = data.get("media_id")
-        media_type = data.get("media_type")
-        
-        # Salva a mensagem completa
-        message_data = {
-            "type": "media_with_text",
-            "text": message.text,
-            "media_id": media_id,
-            "media_type": media_type
-        }
-        
-        await save_message(user_bot, message_data)
-        
-        # Notifica sucesso
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_messages"))
-        
-        await message.answer(
-            "✅ Mensagem com mídia salva com sucesso!",
-            reply_markup=keyboard
-        )
-    else:
-        # Caso seja apenas texto
-        message_data = {
-            "type": "text",
-            "text": message.text
-        }
-        
-        await save_message(user_bot, message_data)
-        
-        # Notifica sucesso
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_messages"))
-        
-        await message.answer(
-            "✅ Mensagem de texto salva com sucesso!",
-            reply_markup=keyboard
-        )
+    
+    # Salva a mensagem completa
+    message_data = {
+        "type": "media_with_text",
+        "text": message.text,
+        "media_id": data.get("media_id"),
+        "media_type": data.get("media_type")
+    }
+    
+    await save_message(user_bot, message_data)
+    
+    # Notifica sucesso
+    keyboard = _back_keyboard("config_messages")
+    
+    await message.answer(
+        "✅ Mensagem com mídia salva com sucesso!",
+        reply_markup=keyboard
+    )
     
     # Reseta o estado
     await state.finish()
@@ -376,12 +395,11 @@ async def message_media_handler(message: types.Message, state: FSMContext):
             reply_markup=keyboard
         )
         
-        # Atualiza o estado para aguardar o texto
-        await BotStates.waiting_message_text.set()
+        # Atualiza o estado para aguardar o texto da mídia
+        await BotStates.waiting_message_media_caption.set()
     else:
         # Mídia não reconhecida
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_messages"))
+        keyboard = _back_keyboard("config_messages")
         
         await message.answer(
             "❌ Tipo de mídia não suportado.\n\n"
@@ -396,8 +414,7 @@ async def view_messages_callback(callback_query: types.CallbackQuery, user_bot:
     
     if not messages:
         # Não há mensagens configuradas
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_messages"))
+        keyboard = _back_keyboard("config_messages")
         
         await callback_query.message.edit_text(
             "❌ Não há mensagens configuradas.",
@@ -408,35 +425,10 @@ async def view_messages_callback(callback_query: types.CallbackQuery, user_bot:
     
     # Envia as mensagens em sequência
     await callback_query.answer("Enviando visualização das mensagens...")
-    
-    for msg in messages:
-        msg_type = msg.get("type", "text")
-        
-        if msg_type == "text":
-            await callback_query.message.answer(msg.get("text", ""), parse_mode="HTML")
-        elif msg_type == "media" or msg_type == "media_with_text":
-            media_id = msg.get("media_id")
-            caption = msg.get("text", "")
-            
-            if media_id:
-                try:
-                    # Determina o tipo de mídia
-                    if msg.get("media_type") == "photo":
-                        await callback_query.message.answer_photo(media_id, caption=caption, parse_mode="HTML")
-                    elif msg.get("media_type") == "video":
-                        await callback_query.message.answer_video(media_id, caption=caption, parse_mode="HTML")
-                    elif msg.get("media_type") == "animation":
-                        await callback_query.message.answer_animation(media_id, caption=caption, parse_mode="HTML")
-                    else:
-                        # Fallback para documentos
-                        await callback_query.message.answer_document(media_id, caption=caption, parse_mode="HTML")
-                except Exception as e:
-                    logger.error(f"Erro ao enviar mídia: {e}", exc_info=True)
-                    await callback_query.message.answer(caption, parse_mode="HTML")
+    await send_configured_messages(callback_query.message, messages)
     
     # Botão para voltar
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_messages"))
+    keyboard = _back_keyboard("config_messages")
     
     await callback_query.message.answer(
         "👀 Visualização das Mensagens de Boas-vindas\n\n"
@@ -451,8 +443,7 @@ async def edit_messages_callback(callback_query: types.CallbackQuery, user_bot:
     
     if not messages:
         # Não há mensagens configuradas
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_messages"))
+        keyboard = _back_keyboard("config_messages")
         
         await callback_query.message.edit_text(
             "❌ Não há mensagens configuradas.",
@@ -509,8 +500,7 @@ async def message_order_callback(callback_query: types.CallbackQuery, user_bot:
     
     if not messages:
         # Não há mensagens configuradas
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_messages"))
+        keyboard = _back_keyboard("config_messages")
         
         await callback_query.message.edit_text(
             "❌ Não há mensagens configuradas.",
@@ -521,26 +511,13 @@ async def message_order_callback(callback_query: types.CallbackQuery, user_bot:
     
     # Cria teclado com as mensagens e botões de ordenação
     keyboard = types.InlineKeyboardMarkup(row_width=3)
+    last_index = len(messages) - 1
     
     for i, msg in enumerate(messages):
-        msg_type = msg.get("type", "text")
         msg_id = msg.get("id", "")
         
-        # Botões de navegação
-        buttons = []
-        if i > 0:  # Pode subir
-            buttons.append(types.InlineKeyboardButton(
-                text="⬆️",
-                callback_data=f"move_message_up:{msg_id}"
-            ))
-        else:
-            buttons.append(types.InlineKeyboardButton(
-                text=" ",
-                callback_data="noop"
-            ))
-        
         # Rótulo da mensagem
-        if msg_type == "text":
+        if msg.get("type", "text") == "text":
             text = msg.get("text", "")
             if len(text) > 20:
                 text = text[:20] + "..."
@@ -548,23 +525,12 @@ async def message_order_callback(callback_query: types.CallbackQuery, user_bot:
         else:
             label = f"{i+1}. foto + texto"
         
-        buttons.append(types.InlineKeyboardButton(
-            text=label,
-            callback_data=f"noop"
-        ))
-        
-        if i < len(messages) - 1:  # Pode descer
-            buttons.append(types.InlineKeyboardButton(
-                text="⬇️",
-                callback_data=f"move_message_down:{msg_id}"
-            ))
-        else:
-            buttons.append(types.InlineKeyboardButton(
-                text=" ",
-                callback_data="noop"
-            ))
-        
-        keyboard.row(*buttons)
+        # Setas de navegação (as pontas usam o botão vazio compartilhado)
+        keyboard.row(
+            types.InlineKeyboardButton(text="⬆️", callback_data=f"move_message_up:{msg_id}") if i > 0 else _NOOP_BUTTON,
+            types.InlineKeyboardButton(text=label, callback_data="noop"),
+            types.InlineKeyboardButton(text="⬇️", callback_data=f"move_message_down:{msg_id}") if i < last_index else _NOOP_BUTTON
+        )
     
     # Adiciona botão para voltar
     keyboard.add(types.InlineKeyboardButton(
@@ -603,8 +569,7 @@ async def config_pushinpay_callback(callback_query: types.CallbackQuery, state:
         )
     else:
         # Não há token configurado
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_admin"))
+        keyboard = _back_keyboard("back_to_admin")
         
         await callback_query.message.edit_text(
             "💰 CONFIGURAR PUSHINPAY\n\n"
@@ -628,40 +593,18 @@ async def pushinpay_token_handler(message: types.Message, state: FSMContext, use
     
     if success:
         # Notifica sucesso
-        keyboard = types.InlineKeyboardMarkup(row_width=2)
-        keyboard.add(
-            types.InlineKeyboardButton(text="📝 Configurar mensagens", callback_data="config_messages"),
-            types.InlineKeyboardButton(text="💰 Integrar Pushin Pay", callback_data="config_pushinpay")
-        )
-        keyboard.add(
-            types.InlineKeyboardButton(text="👥 Adicionar canal/grupo", callback_data="config_chat"),
-            types.InlineKeyboardButton(text="📞 Configurar suporte", callback_data="config_support")
-        )
-        keyboard.add(
-            types.InlineKeyboardButton(text="📊 Métricas de Vendas", callback_data="sales_metrics"),
-            types.InlineKeyboardButton(text="🛍 Adicionar Upsell", callback_data="config_upsell")
-        )
-        keyboard.add(
-            types.InlineKeyboardButton(text="💱 Adicionar Order Bump", callback_data="config_order_bump"),
-            types.InlineKeyboardButton(text="📤 Remarketing", callback_data="config_remarketing")
-        )
-        keyboard.add(
-            types.InlineKeyboardButton(text="🎯 Criar planos", callback_data="config_plans")
-        )
-        
         await message.answer(
             "✅ TOKEN CONFIGURADO!\n\n"
             "Seu token da PushinPay foi configurado com sucesso. "
             "Agora você pode receber pagamentos via PIX.",
-            reply_markup=keyboard
+            reply_markup=_ADMIN_MENU_KEYBOARD
         )
         
         # Reseta o estado
         await state.finish()
     else:
         # Notifica erro
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_pushinpay"))
+        keyboard = _back_keyboard("config_pushinpay")
         
         await message.answer(
             "❌ Erro ao salvar o token.\n\n"
@@ -729,14 +672,16 @@ async def chat_id_handler(message: types.Message, state: FSMContext, user_bot: U
         chat_id = message.text.strip()
         
         # Verifica se o ID está no formato correto
-        if not (chat_id.startswith('-100') and chat_id[4:].isdigit()):
+        if not _CHAT_ID_RE.fullmatch(chat_id):
             raise ValueError("ID inválido")
         
-        # Tenta obter informações do chat
-        chat = await user_bot.bot.get_chat(chat_id)
+        # Obtém as informações do chat e a participação do bot em paralelo
+        chat, bot_member = await asyncio.gather(
+            user_bot.bot.get_chat(chat_id),
+            user_bot.bot.get_chat_member(chat_id, user_bot.bot.id)
+        )
         
         # Verifica se o bot é administrador
-        bot_member = await chat.get_member(user_bot.bot.id)
         is_admin = bot_member.is_chat_admin()
         
         if not is_admin:
@@ -758,8 +703,7 @@ async def chat_id_handler(message: types.Message, state: FSMContext, user_bot: U
         
         if success:
             # Notifica sucesso
-            keyboard = types.InlineKeyboardMarkup()
-            keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_chat"))
+            keyboard = _back_keyboard("config_chat")
             
             await message.answer(
                 f"✅ Chat VIP configurado com sucesso!\n\n"
@@ -772,8 +716,7 @@ async def chat_id_handler(message: types.Message, state: FSMContext, user_bot: U
             await state.finish()
         else:
             # Notifica erro
-            keyboard = types.InlineKeyboardMarkup()
-            keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_chat"))
+            keyboard = _back_keyboard("config_chat")
             
             await message.answer(
                 "❌ Erro ao salvar a configuração do chat.\n\n"
@@ -782,8 +725,7 @@ async def chat_id_handler(message: types.Message, state: FSMContext, user_bot: U
             )
     except ValueError:
         # ID inválido
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_chat"))
+        keyboard = _back_keyboard("config_chat")
         
         await message.answer(
             "❌ ID inválido.\n\n"
@@ -794,8 +736,7 @@ async def chat_id_handler(message: types.Message, state: FSMContext, user_bot: U
         # Erro ao obter informações do chat
         logger.error(f"Erro ao verificar chat: {e}", exc_info=True)
         
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_chat"))
+        keyboard = _back_keyboard("config_chat")
         
         await message.answer(
             "❌ Erro ao verificar o chat.\n\n"
@@ -826,8 +767,7 @@ async def config_support_callback(callback_query: types.CallbackQuery, state: FS
         )
     else:
         # Não há usuário configurado
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_admin"))
+        keyboard = _back_keyboard("back_to_admin")
         
         await callback_query.message.edit_text(
             "📱 CONFIGURAR USUÁRIO DE SUPORTE\n\n"
@@ -874,8 +814,7 @@ async def support_username_handler(message: types.Message, state: FSMContext, us
     
     if success:
         # Notifica sucesso
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_admin"))
+        keyboard = _back_keyboard("back_to_admin")
         
         await message.answer(
             f"✅ Usuário de suporte configurado com sucesso!\n\n"
@@ -888,8 +827,7 @@ async def support_username_handler(message: types.Message, state: FSMContext, us
         await state.finish()
     else:
         # Notifica erro
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_support"))
+        keyboard = _back_keyboard("config_support")
         
         await message.answer(
             "❌ Erro ao salvar a configuração de suporte.\n\n"
@@ -973,8 +911,7 @@ async def metrics_period_callback(callback_query: types.CallbackQuery, user_bot:
     )
     
     # Cria teclado para voltar
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="sales_metrics"))
+    keyboard = _back_keyboard("sales_metrics")
     
     await callback_query.message.edit_text(text, reply_markup=keyboard)
     await callback_query.answer()
@@ -1161,8 +1098,7 @@ async def plan_duration_callback(callback_query: types.CallbackQuery, state: FSM
         await state.finish()
     else:
         # Notifica erro
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_plans"))
+        keyboard = _back_keyboard("config_plans")
         
         await callback_query.message.edit_text(
             "❌ Erro ao salvar o plano.\n\n"
@@ -1174,13 +1110,12 @@ async def plan_duration_callback(callback_query: types.CallbackQuery, state: FSM
 
 async def view_plans_complete_callback(callback_query: types.CallbackQuery, user_bot: UserBot):
     """Handler para o callback de visualização completa dos planos"""
-    # Obtém os planos configurados
-    plans = await get_plans(user_bot)
+    # Obtém os planos e as mensagens de boas-vindas em paralelo
+    plans, welcome_messages = await asyncio.gather(get_plans(user_bot), get_welcome_messages(user_bot))
     
     if not plans:
         # Não há planos configurados
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_plans"))
+        keyboard = _back_keyboard("config_plans")
         
         await callback_query.message.edit_text(
             "❌ Não há planos configurados.",
@@ -1189,37 +1124,11 @@ async def view_plans_complete_callback(callback_query: types.CallbackQuery, user
         await callback_query.answer()
         return
     
-    # Cria preview das mensagens de boas-vindas
-    welcome_messages = await get_welcome_messages(user_bot)
-    
     # Envia as mensagens em sequência
     await callback_query.answer("Enviando visualização completa...")
     
     # Primeiro envia as mensagens de boas-vindas
-    for msg in welcome_messages:
-        msg_type = msg.get("type", "text")
-        
-        if msg_type == "text":
-            await callback_query.message.answer(msg.get("text", ""), parse_mode="HTML")
-        elif msg_type == "media" or msg_type == "media_with_text":
-            media_id = msg.get("media_id")
-            caption = msg.get("text", "")
-            
-            if media_id:
-                try:
-                    # Determina o tipo de mídia
-                    if msg.get("media_type") == "photo":
-                        await callback_query.message.answer_photo(media_id, caption=caption, parse_mode="HTML")
-                    elif msg.get("media_type") == "video":
-                        await callback_query.message.answer_video(media_id, caption=caption, parse_mode="HTML")
-                    elif msg.get("media_type") == "animation":
-                        await callback_query.message.answer_animation(media_id, caption=caption, parse_mode="HTML")
-                    else:
-                        # Fallback para documentos
-                        await callback_query.message.answer_document(media_id, caption=caption, parse_mode="HTML")
-                except Exception as e:
-                    logger.error(f"Erro ao enviar mídia: {e}", exc_info=True)
-                    await callback_query.message.answer(caption, parse_mode="HTML")
+    await send_configured_messages(callback_query.message, welcome_messages)
     
     # Cria teclado com os planos
     keyboard = types.InlineKeyboardMarkup(row_width=2)
@@ -1286,7 +1195,7 @@ async def config_upsell_callback(callback_query: types.CallbackQuery, state: FSM
             types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_admin")
         )
         
-        await callback_query.message.edit_text(text, reply_markup=keyboard)
+        await edit_menu_message(callback_query.message, text, keyboard)
     else:
         # Não há configuração de upsell
         text = (
@@ -1441,8 +1350,7 @@ async def upsell_link_handler(message: types.Message, state: FSMContext, user_bo
     
     if success:
         # Notifica sucesso
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_admin"))
+        keyboard = _back_keyboard("back_to_admin")
         
         await message.answer(
             "✅ UPSELL CONFIGURADO COM SUCESSO!\n\n"
@@ -1458,8 +1366,7 @@ async def upsell_link_handler(message: types.Message, state: FSMContext, user_bo
         await state.finish()
     else:
         # Notifica erro
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_upsell"))
+        keyboard = _back_keyboard("config_upsell")
         
         await message.answer(
             "❌ Erro ao salvar a configuração de upsell.\n\n"
@@ -1498,7 +1405,7 @@ async def config_order_bump_callback(callback_query: types.CallbackQuery, state:
             types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_admin")
         )
         
-        await callback_query.message.edit_text(text, reply_markup=keyboard)
+        await edit_menu_message(callback_query.message, text, keyboard)
     else:
         # Não há configuração de order bump
         text = (
@@ -1631,8 +1538,7 @@ async def order_bump_link_handler(message: types.Message, state: FSMContext, use
     
     if success:
         # Notifica sucesso
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_admin"))
+        keyboard = _back_keyboard("back_to_admin")
         
         await message.answer(
             "✅ ORDER BUMP CONFIGURADO COM SUCESSO!\n\n"
@@ -1647,8 +1553,7 @@ async def order_bump_link_handler(message: types.Message, state: FSMContext, use
         await state.finish()
     else:
         # Notifica erro
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_order_bump"))
+        keyboard = _back_keyboard("config_order_bump")
         
         await message.answer(
             "❌ Erro ao salvar a configuração de Order Bump.\n\n"
@@ -1711,8 +1616,7 @@ async def remarketing_promotion_callback(callback_query: types.CallbackQuery, st
         
         if not plans:
             # Não há planos configurados
-            keyboard = types.InlineKeyboardMarkup()
-            keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="config_remarketing"))
+            keyboard = _back_keyboard("config_remarketing")
             
             await callback_query.message.edit_text(
                 "❌ Não há planos configurados para criar uma promoção.\n\n"
@@ -1943,8 +1847,7 @@ async def send_remarketing_callback(callback_query: types.CallbackQuery, state:
     sent_count = await send_remarketing_message(user_bot, message_data, target == "non_paying")
     
     # Notifica o resultado
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(types.InlineKeyboardButton(text="🔙 Voltar", callback_data="back_to_admin"))
+    keyboard = _back_keyboard("back_to_admin")
     
     await callback_query.message.edit_text(
         f"✅ Remarketing enviado com sucesso!\n\n"
@@ -2038,8 +1941,11 @@ async def order_bump_callback(callback_query: types.CallbackQuery, user_bot: Use
     """Handler para o callback de seleção de order bump"""
     user_id = callback_query.from_user.id
     
-    # Obtém dados do order bump
-    order_bump = await get_order_bump_config(user_bot)
+    # Obtém dados do order bump e token da PushinPay em paralelo
+    order_bump, token = await asyncio.gather(
+        get_order_bump_config(user_bot),
+        get_pushinpay_token(user_bot)
+    )
     
     if not order_bump or not order_bump.get("active", False):
         # Order bump não encontrado ou inativo
@@ -2047,7 +1953,6 @@ async def order_bump_callback(callback_query: types.CallbackQuery, user_bot: Use
         return
     
     # Verifica se há token da PushinPay configurado
-    token = await get_pushinpay_token(user_bot)
     
     if not token:
         # Não há token configurado
@@ -2130,7 +2035,7 @@ async def help_command(message: types.Message, user_bot: UserBot):
     user_id = message.from_user.id
     bot_owner_id = user_bot.user_id
     
-    if str(user_id) == str(bot_owner_id):
+    if user_id == bot_owner_id:
         # Para o dono do bot
         text = (
             "📚 COMANDOS DISPONÍVEIS\n\n"
@@ -2178,6 +2083,96 @@ async def noop_callback(callback_query: types.CallbackQuery):
     """Handler para callbacks que não fazem nada"""
     await callback_query.answer()
 
+# Roteamento de callbacks
+
+# Callbacks identificados pelo texto completo (data -> handler)
+_CALLBACK_ROUTES = {
+    # Menu admin
+    "back_to_admin": back_to_admin_callback,
+    "noop": noop_callback,
+    
+    # Configuração de mensagens
+    "config_messages": config_messages_callback,
+    "new_message": new_message_callback,
+    "new_text_message": new_text_message_callback,
+    "new_media_message": new_media_message_callback,
+    "view_messages": view_messages_callback,
+    "edit_messages": edit_messages_callback,
+    "message_order": message_order_callback,
+    
+    # Configuração da PushinPay
+    "config_pushinpay": config_pushinpay_callback,
+    "update_pushinpay": config_pushinpay_callback,
+    
+    # Configuração de chat VIP
+    "config_chat": config_chat_callback,
+    "set_chat": set_chat_callback,
+    
+    # Configuração de suporte
+    "config_support": config_support_callback,
+    "update_support": update_support_callback,
+    
+    # Métricas
+    "sales_metrics": sales_metrics_callback,
+    
+    # Configuração de planos
+    "config_plans": config_plans_callback,
+    "add_plan": add_plan_callback,
+    "view_plans_complete": view_plans_complete_callback,
+    
+    # Configuração de upsell
+    "config_upsell": config_upsell_callback,
+    "edit_upsell": edit_upsell_callback,
+    "toggle_upsell": toggle_upsell_callback,
+    
+    # Configuração de order bump
+    "config_order_bump": config_order_bump_callback,
+    "edit_order_bump": edit_order_bump_callback,
+    "toggle_order_bump": toggle_order_bump_callback,
+    
+    # Remarketing
+    "config_remarketing": config_remarketing_callback,
+    "edit_remarketing": edit_remarketing_callback,
+    "send_remarketing": send_remarketing_callback,
+    
+    # Seleção de planos
+    "order_bump": order_bump_callback,
+}
+
+# Callbacks no formato "prefixo:valor" (prefixo -> handler)
+_PREFIX_CALLBACK_ROUTES = {
+    "metrics": metrics_period_callback,
+    "remarketing_target": remarketing_target_callback,
+    "remarketing_promotion": remarketing_promotion_callback,
+    "remarketing_plan": remarketing_plan_callback,
+    "plan": plan_callback,
+}
+
+# Todos os prefixos em uma única regex, compilada uma vez
+_PREFIX_CALLBACK_RE = re.compile("^(" + "|".join(map(re.escape, _PREFIX_CALLBACK_ROUTES)) + "):")
+
+# Parâmetros aceitos por cada handler, para repassar só os dados que ele espera
+_ROUTE_PARAMS = {
+    handler: frozenset(inspect.signature(handler).parameters)
+    for handler in {*_CALLBACK_ROUTES.values(), *_PREFIX_CALLBACK_ROUTES.values()}
+}
+
+def match_callback_route(callback_query: types.CallbackQuery):
+    """Resolve o handler do callback com uma consulta ao dicionário ou uma única regex"""
+    data = callback_query.data or ""
+    route = _CALLBACK_ROUTES.get(data)
+    if route is None:
+        match = _PREFIX_CALLBACK_RE.match(data)
+        if match is None:
+            return False
+        route = _PREFIX_CALLBACK_ROUTES[match.group(1)]
+    return {"route": route}
+
+async def route_callback(callback_query: types.CallbackQuery, route, **kwargs):
+    """Encaminha o callback para o handler resolvido pelo filtro"""
+    params = _ROUTE_PARAMS[route]
+    await route(callback_query, **{key: value for key, value in kwargs.items() if key in params})
+
 # Registro de handlers
 
 def register_handlers(dp: Dispatcher):
@@ -2187,78 +2182,42 @@ def register_handlers(dp: Dispatcher):
     dp.register_message_handler(help_command, commands=["help"], state="*")
     dp.register_message_handler(support_command, commands=["suporte"], state="*")
     
-    # Callbacks do menu admin
-    dp.register_callback_query_handler(back_to_admin_callback, lambda c: c.data == "back_to_admin", state="*")
-    dp.register_callback_query_handler(noop_callback, lambda c: c.data == "noop", state="*")
+    # Callbacks roteados por _CALLBACK_ROUTES / _PREFIX_CALLBACK_ROUTES
+    dp.register_callback_query_handler(route_callback, match_callback_route, state="*")
     
     # Handlers para configuração de mensagens
-    dp.register_callback_query_handler(config_messages_callback, lambda c: c.data == "config_messages", state="*")
-    dp.register_callback_query_handler(new_message_callback, lambda c: c.data == "new_message", state="*")
-    dp.register_callback_query_handler(new_text_message_callback, lambda c: c.data == "new_text_message", state="*")
-    dp.register_callback_query_handler(new_media_message_callback, lambda c: c.data == "new_media_message", state="*")
     dp.register_message_handler(message_text_handler, state=BotStates.waiting_message_text)
     dp.register_message_handler(message_media_handler, content_types=types.ContentTypes.ANY, state=BotStates.waiting_message_media)
-    dp.register_callback_query_handler(view_messages_callback, lambda c: c.data == "view_messages", state="*")
-    dp.register_callback_query_handler(edit_messages_callback, lambda c: c.data == "edit_messages", state="*")
-    dp.register_callback_query_handler(message_order_callback, lambda c: c.data == "message_order", state="*")
+    dp.register_message_handler(message_caption_handler, state=BotStates.waiting_message_media_caption)
     
     # Handlers para configuração da PushinPay
-    dp.register_callback_query_handler(config_pushinpay_callback, lambda c: c.data == "config_pushinpay", state="*")
-    dp.register_callback_query_handler(config_pushinpay_callback, lambda c: c.data == "update_pushinpay", state="*")
     dp.register_message_handler(pushinpay_token_handler, state=BotStates.waiting_pushinpay_token)
     
     # Handlers para configuração de chat VIP
-    dp.register_callback_query_handler(config_chat_callback, lambda c: c.data == "config_chat", state="*")
-    dp.register_callback_query_handler(set_chat_callback, lambda c: c.data == "set_chat", state="*")
     dp.register_message_handler(chat_id_handler, state=BotStates.waiting_chat_id)
     
     # Handlers para configuração de suporte
-    dp.register_callback_query_handler(config_support_callback, lambda c: c.data == "config_support", state="*")
-    dp.register_callback_query_handler(update_support_callback, lambda c: c.data == "update_support", state="*")
     dp.register_message_handler(support_username_handler, state=BotStates.waiting_support_username)
     
-    # Handlers para visualização de métricas
-    dp.register_callback_query_handler(sales_metrics_callback, lambda c: c.data == "sales_metrics", state="*")
-    dp.register_callback_query_handler(metrics_period_callback, lambda c: c.data.startswith("metrics:"), state="*")
-    
     # Handlers para configuração de planos
-    dp.register_callback_query_handler(config_plans_callback, lambda c: c.data == "config_plans", state="*")
-    dp.register_callback_query_handler(add_plan_callback, lambda c: c.data == "add_plan", state="*")
     dp.register_message_handler(plan_name_handler, state=BotStates.waiting_plan_name)
     dp.register_message_handler(plan_price_handler, state=BotStates.waiting_plan_price)
     dp.register_callback_query_handler(plan_duration_callback, lambda c: c.data.startswith("plan_duration:"), state=BotStates.waiting_plan_duration)
-    dp.register_callback_query_handler(view_plans_complete_callback, lambda c: c.data == "view_plans_complete", state="*")
     
     # Handlers para configuração de upsell
-    dp.register_callback_query_handler(config_upsell_callback, lambda c: c.data == "config_upsell", state="*")
-    dp.register_callback_query_handler(edit_upsell_callback, lambda c: c.data == "edit_upsell", state="*")
-    dp.register_callback_query_handler(toggle_upsell_callback, lambda c: c.data == "toggle_upsell", state="*")
     dp.register_message_handler(upsell_text_handler, state=BotStates.waiting_upsell_text)
     dp.register_message_handler(upsell_button_text_handler, state=BotStates.waiting_upsell_button_text)
     dp.register_message_handler(upsell_price_handler, state=BotStates.waiting_upsell_price)
     dp.register_message_handler(upsell_link_handler, state=BotStates.waiting_upsell_link)
     
     # Handlers para configuração de order bump
-    dp.register_callback_query_handler(config_order_bump_callback, lambda c: c.data == "config_order_bump", state="*")
-    dp.register_callback_query_handler(edit_order_bump_callback, lambda c: c.data == "edit_order_bump", state="*")
-    dp.register_callback_query_handler(toggle_order_bump_callback, lambda c: c.data == "toggle_order_bump", state="*")
     dp.register_message_handler(order_bump_text_handler, state=BotStates.waiting_order_bump_text)
     dp.register_message_handler(order_bump_price_handler, state=BotStates.waiting_order_bump_price)
     dp.register_message_handler(order_bump_link_handler, state=BotStates.waiting_order_bump_link)
     
     # Handlers para remarketing
-    dp.register_callback_query_handler(config_remarketing_callback, lambda c: c.data == "config_remarketing", state="*")
-    dp.register_callback_query_handler(remarketing_target_callback, lambda c: c.data.startswith("remarketing_target:"), state="*")
-    dp.register_callback_query_handler(remarketing_promotion_callback, lambda c: c.data.startswith("remarketing_promotion:"), state="*")
-    dp.register_callback_query_handler(remarketing_plan_callback, lambda c: c.data.startswith("remarketing_plan:"), state="*")
     dp.register_message_handler(remarketing_price_handler, state=BotStates.waiting_remarketing_price)
     dp.register_message_handler(remarketing_message_handler, content_types=types.ContentTypes.ANY, state=BotStates.waiting_remarketing_message)
-    dp.register_callback_query_handler(edit_remarketing_callback, lambda c: c.data == "edit_remarketing", state="*")
-    dp.register_callback_query_handler(send_remarketing_callback, lambda c: c.data == "send_remarketing", state="*")
-    
-    # Handlers para seleção de planos
-    dp.register_callback_query_handler(plan_callback, lambda c: c.data.startswith("plan:"), state="*")
-    dp.register_callback_query_handler(order_bump_callback, lambda c: c.data == "order_bump", state="*")
 
 # Inicialização
 
@@ -6,13 +6,20 @@ Funções de order bump para os bots dos usuários
 """
 
 import logging
+import time
 import uuid
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 from core.database import Database
 
 logger = logging.getLogger(__name__)
 
+# Tempo (em segundos) que a configuração de order bump de cada bot fica em cache
+ORDER_BUMP_CACHE_TTL = 30
+
+# Cache local: dono do bot -> (momento da leitura, configuração ou None)
+_order_bump_cache: Dict[int, Tuple[float, Optional[Dict[str, Any]]]] = {}
+
 async def get_order_bump_config(user_bot) -> Optional[Dict[str, Any]]:
     """
     Obtém a configuração de order bump para o bot do usuário
@@ -23,6 +30,10 @@ async def get_order_bump_config(user_bot) -> Optional[Dict[str, Any]]:
     Returns:
         Optional[Dict]: Configuração de order bump ou None se não estiver configurada
     """
+    cached = _order_bump_cache.get(user_bot.user_id)
+    if cached and time.monotonic() - cached[0] < ORDER_BUMP_CACHE_TTL:
+        return dict(cached[1]) if cached[1] else None
+    
     try:
         db = Database()
         
@@ -34,16 +45,17 @@ async def get_order_bump_config(user_bot) -> Optional[Dict[str, Any]]:
         
         result = await db.fetch_one(query, (user_bot.user_id,))
         
-        if not result:
-            return None
-        
-        return {
+        config = {
             "id": str(result["id"]),
             "text": result["text"],
             "price": float(result["price"]),
             "link": result["link"],
             "active": bool(result["active"])
-        }
+        } if result else None
+        
+        # A ausência de configuração também é guardada, evitando consultas repetidas
+        _order_bump_cache[user_bot.user_id] = (time.monotonic(), config)
+        return dict(config) if config else None
     except Exception as e:
         logger.error(f"Erro ao obter configuração de order bump: {e}", exc_info=True)
         return None
@@ -122,6 +134,7 @@ async def save_order_bump_config(user_bot, config: Dict[str, Any]) -> bool:
                 )
             )
         
+        _order_bump_cache.pop(user_bot.user_id, None)
         return True
     except Exception as e:
         logger.error(f"Erro ao salvar configuração de order bump: {e}", exc_info=True)
@@ -163,6 +176,7 @@ async def toggle_order_bump(user_bot) -> bool:
         
         await db.execute(query, (new_state, user_bot.user_id))
         
+        _order_bump_cache.pop(user_bot.user_id, None)
         return True
     except Exception as e:
         logger.error(f"Erro ao alternar status do order bump: {e}", exc_info=True)
@@ -6,14 +6,21 @@ Gerenciamento de planos para os bots dos usuários
 """
 
 import logging
+import time
 import uuid
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 from core.database import Database
 from core.utils import format_price
 
 logger = logging.getLogger(__name__)
 
+# Tempo (em segundos) que os planos de cada bot ficam em cache
+PLANS_CACHE_TTL = 30
+
+# Cache local: dono do bot -> (momento da leitura, planos)
+_plans_cache: Dict[int, Tuple[float, List[Dict[str, Any]]]] = {}
+
 async def get_plans(user_bot) -> List[Dict[str, Any]]:
     """
     Obtém todos os planos configurados para o bot do usuário
@@ -24,6 +31,10 @@ async def get_plans(user_bot) -> List[Dict[str, Any]]:
     Returns:
         List[Dict]: Lista de planos
     """
+    cached = _plans_cache.get(user_bot.user_id)
+    if cached and time.monotonic() - cached[0] < PLANS_CACHE_TTL:
+        return list(cached[1])
+    
     try:
         db = Database()
         
@@ -48,8 +59,9 @@ async def get_plans(user_bot) -> List[Dict[str, Any]]:
             }
             
             formatted_plans.append(plan_data)
-            
-        return formatted_plans
+        
+        _plans_cache[user_bot.user_id] = (time.monotonic(), formatted_plans)
+        return list(formatted_plans)
     except Exception as e:
         logger.error(f"Erro ao obter planos: {e}", exc_info=True)
         return []
@@ -135,6 +147,7 @@ async def save_plan(user_bot, plan_data: Dict[str, Any]) -> bool:
             )
         )
         
+        _plans_cache.pop(user_bot.user_id, None)
         return True
     except Exception as e:
         logger.error(f"Erro ao salvar plano: {e}", exc_info=True)
@@ -196,6 +209,7 @@ async def update_plan(user_bot, plan_id: str, plan_data: Dict[str, Any]) -> bool
             )
         )
         
+        _plans_cache.pop(user_bot.user_id, None)
         return True
     except Exception as e:
         logger.error(f"Erro ao atualizar plano {plan_id}: {e}", exc_info=True)
@@ -219,6 +233,7 @@ async def delete_plan(user_bot, plan_id: str) -> bool:
         query = "DELETE FROM plans WHERE id = %s AND user_id = %s"
         await db.execute(query, (plan_id, user_bot.user_id))
         
+        _plans_cache.pop(user_bot.user_id, None)
         return True
     except Exception as e:
         logger.error(f"Erro ao excluir plano {plan_id}: {e}", exc_info=True)
@@ -252,6 +267,7 @@ async def toggle_plan(user_bot, plan_id: str) -> bool:
         query = "UPDATE plans SET active = %s, updated_at = NOW() WHERE id = %s AND user_id = %s"
         await db.execute(query, (new_state, plan_id, user_bot.user_id))
         
+        _plans_cache.pop(user_bot.user_id, None)
         return True
     except Exception as e:
         logger.error(f"Erro ao alternar status do plano {plan_id}: {e}", exc_info=True)
@@ -12,10 +12,15 @@ from typing import Dict, Any, List, Optional
 from aiogram import types
 from core.database import Database
 from core.bot_manager import get_bot_instance
+from core.utils import RateLimiter
 from user_bot.payment import create_payment
 
 logger = logging.getLogger(__name__)
 
+# Envio de remarketing: envios simultâneos e mensagens por segundo (limite do Telegram: 30/s)
+REMARKETING_CONCURRENCY = 20
+REMARKETING_RATE_LIMIT = 25
+
 async def prepare_remarketing_message(message, user_bot, message_data: Dict[str, Any]) -> None:
     """
     Prepara e envia uma prévia da mensagem de remarketing
@@ -171,7 +176,6 @@ async def send_remarketing_message(user_bot, message_data: Dict[str, Any], only_
         # Verifica se há promoção para adicionar
         has_promotion = "promotion" in message_data
         promotion_data = None
-        promo_keyboard = None
         
         if has_promotion:
             promotion_data = message_data["promotion"]
@@ -188,130 +192,137 @@ async def send_remarketing_message(user_bot, message_data: Dict[str, Any], only_
                 plan_name = promotion_data.get("plan_name", "Plano")
                 promo_text = f"🔥 APROVEITAR {plan_name}: R$ {promo_price:.2f} 🔥"
         
-        # Contador de mensagens enviadas
-        sent_count = 0
+        # Limita os envios simultâneos e a taxa de mensagens (limite do Telegram: 30/s)
+        semaphore = asyncio.Semaphore(REMARKETING_CONCURRENCY)
+        limiter = RateLimiter(REMARKETING_RATE_LIMIT)
         
-        # Envia para cada usuário
-        for user in users:
-            user_id = user["user_id"]
+        async def send_content(user_id: int, promo_keyboard: Optional[types.InlineKeyboardMarkup]):
+            """Envia o conteúdo da mensagem conforme o tipo"""
+            # Determina o tipo de mensagem
+            msg_type = message_data.get("type", "text")
             
-            # Cria teclado específico para o usuário se tiver promoção
-            if has_promotion:
-                # Cria pagamento para o usuário
-                payment_data = {
-                    "user_id": user_id,
-                    "amount": promotion_data.get("price", 0),
-                    "payment_type": "remarketing"
-                }
+            # Envia a mensagem conforme o tipo
+            if msg_type == "text":
+                text = message_data.get("text", "")
                 
-                # Adiciona dados do plano, se necessário
-                if not promotion_data.get("custom", False):
-                    payment_data["plan_id"] = promotion_data.get("plan_id")
-                    payment_data["duration"] = promotion_data.get("plan_duration")
+                await bot.send_message(
+                    chat_id=user_id,
+                    text=text, 
+                    reply_markup=promo_keyboard,
+                    parse_mode="HTML"
+                )
+            elif msg_type == "photo":
+                file_id = message_data.get("file_id")
+                caption = message_data.get("caption", "")
                 
-                # Cria o pagamento
-                payment_result = await create_payment(user_bot, payment_data)
+                await bot.send_photo(
+                    chat_id=user_id,
+                    photo=file_id,
+                    caption=caption,
+                    reply_markup=promo_keyboard,
+                    parse_mode="HTML"
+                )
+            elif msg_type == "video":
+                file_id = message_data.get("file_id")
+                caption = message_data.get("caption", "")
                 
-                if payment_result.get("success", False):
-                    # Cria teclado com link de pagamento
-                    payment_url = payment_result.get("payment_url", "")
-                    
-                    if payment_url:
-                        promo_keyboard = types.InlineKeyboardMarkup()
-                        promo_keyboard.add(types.InlineKeyboardButton(
-                            text=promo_text,
-                            url=payment_url
-                        ))
-            
-            try:
-                # Determina o tipo de mensagem
-                msg_type = message_data.get("type", "text")
+                await bot.send_video(
+                    chat_id=user_id,
+                    video=file_id,
+                    caption=caption,
+                    reply_markup=promo_keyboard,
+                    parse_mode="HTML"
+                )
+            elif msg_type == "animation":
+                file_id = message_data.get("file_id")
+                caption = message_data.get("caption", "")
                 
-                # Envia a mensagem conforme o tipo
-                if msg_type == "text":
-                    text = message_data.get("text", "")
-                    
-                    await bot.send_message(
-                        chat_id=user_id,
-                        text=text, 
-                        reply_markup=promo_keyboard,
-                        parse_mode="HTML"
-                    )
-                elif msg_type == "photo":
-                    file_id = message_data.get("file_id")
-                    caption = message_data.get("caption", "")
-                    
-                    await bot.send_photo(
-                        chat_id=user_id,
-                        photo=file_id,
-                        caption=caption,
-                        reply_markup=promo_keyboard,
-                        parse_mode="HTML"
-                    )
-                elif msg_type == "video":
-                    file_id = message_data.get("file_id")
-                    caption = message_data.get("caption", "")
-                    
-                    await bot.send_video(
-                        chat_id=user_id,
-                        video=file_id,
-                        caption=caption,
-                        reply_markup=promo_keyboard,
-                        parse_mode="HTML"
-                    )
-                elif msg_type == "animation":
-                    file_id = message_data.get("file_id")
-                    caption = message_data.get("caption", "")
-                    
-                    await bot.send_animation(
-                        chat_id=user_id,
-                        animation=file_id,
-                        caption=caption,
-                        reply_markup=promo_keyboard,
-                        parse_mode="HTML"
-                    )
-                elif msg_type == "voice":
-                    file_id = message_data.get("file_id")
-                    caption = message_data.get("caption", "")
-                    
-                    await bot.send_voice(
-                        chat_id=user_id,
-                        voice=file_id,
-                        caption=caption,
-                        reply_markup=promo_keyboard,
-                        parse_mode="HTML"
-                    )
-                elif msg_type == "audio":
-                    file_id = message_data.get("file_id")
-                    caption = message_data.get("caption", "")
-                    
-                    await bot.send_audio(
-                        chat_id=user_id,
-                        audio=file_id,
-                        caption=caption,
-                        reply_markup=promo_keyboard,
-                        parse_mode="HTML"
-                    )
-                elif msg_type == "document":
-                    file_id = message_data.get("file_id")
-                    caption = message_data.get("caption", "")
-                    
-                    await bot.send_document(
-                        chat_id=user_id,
-                        document=file_id,
-                        caption=caption,
-                        reply_markup=promo_keyboard,
-                        parse_mode="HTML"
-                    )
+                await bot.send_animation(
+                    chat_id=user_id,
+                    animation=file_id,
+                    caption=caption,
+                    reply_markup=promo_keyboard,
+                    parse_mode="HTML"
+                )
+            elif msg_type == "voice":
+                file_id = message_data.get("file_id")
+                caption = message_data.get("caption", "")
                 
-                # Incrementa contador
-                sent_count += 1
+                await bot.send_voice(
+                    chat_id=user_id,
+                    voice=file_id,
+                    caption=caption,
+                    reply_markup=promo_keyboard,
+                    parse_mode="HTML"
+                )
+            elif msg_type == "audio":
+                file_id = message_data.get("file_id")
+                caption = message_data.get("caption", "")
                 
-                # Pequeno delay para evitar flood
-                await asyncio.sleep(0.05)
-            except Exception as e:
-                logger.error(f"Erro ao enviar remarketing para o usuário {user_id}: {e}")
-                # Continua para o próximo usuário
+                await bot.send_audio(
+                    chat_id=user_id,
+                    audio=file_id,
+                    caption=caption,
+                    reply_markup=promo_keyboard,
+                    parse_mode="HTML"
+                )
+            elif msg_type == "document":
+                file_id = message_data.get("file_id")
+                caption = message_data.get("caption", "")
+                
+                await bot.send_document(
+                    chat_id=user_id,
+                    document=file_id,
+                    caption=caption,
+                    reply_markup=promo_keyboard,
+                    parse_mode="HTML"
+                )
+        
+        async def send_to_user(user_id: int) -> bool:
+            """Envia a mensagem de remarketing para um usuário"""
+            async with semaphore:
+                try:
+                    promo_keyboard = None
+                    
+                    # Cria teclado específico para o usuário se tiver promoção
+                    if has_promotion:
+                        # Cria pagamento para o usuário
+                        payment_data = {
+                            "user_id": user_id,
+                            "amount": promotion_data.get("price", 0),
+                            "payment_type": "remarketing"
+                        }
+                        
+                        # Adiciona dados do plano, se necessário
+                        if not promotion_data.get("custom", False):
+                            payment_data["plan_id"] = promotion_data.get("plan_id")
+                            payment_data["duration"] = promotion_data.get("plan_duration")
+                        
+                        # Cria o pagamento
+                        payment_result = await create_payment(user_bot, payment_data)
+                        
+                        if payment_result.get("success", False):
+                            # Cria teclado com link de pagamento
+                            payment_url = payment_result.get("payment_url", "")
+                            
+                            if payment_url:
+                                promo_keyboard = types.InlineKeyboardMarkup()
+                                promo_keyboard.add(types.InlineKeyboardButton(
+                                    text=promo_text,
+                                    url=payment_url
+                                ))
+                    
+                    async with limiter:
+                        await send_content(user_id, promo_keyboard)
+                    return True
+                except Exception as e:
+                    logger.error(f"Erro ao enviar remarketing para o usuário {user_id}: {e}")
+                    # Continua para o próximo usuário
+                    return False
+        
+        # Envia para todos os usuários em paralelo, com concorrência limitada
+        results = await asyncio.gather(*(send_to_user(user["user_id"]) for user in users))
+        sent_count = sum(results)
         
         return sent_count
     except Exception as e:
@@ -9,13 +9,15 @@ Responsável por gerenciar e manter online todos os bots criados pelos usuários
 import asyncio
 import logging
 import os
-from aiogram import Bot
 from dotenv import load_dotenv
 
 from config.settings import get_redis_url
+from config.constants import BotStatus
 from core.database import Database
-from core.bot_manager import BotManager, UserBot
+from core.bot_manager import BotManager, UserBot, get_monitor_wakeup, mark_bot_running, mark_bot_stopped
+from core.telegram_session import SharedSessionBot, close_telegram_session
 from user_bot.handlers import create_user_bot_dispatcher
+from integrations.pushin_pay.client import pushin_pay_http
 
 # Configuração de logs
 logger = logging.getLogger(__name__)
@@ -36,7 +38,7 @@ async def load_user_bots():
 async def start_user_bot(token, bot_data):
     """Inicia um bot de usuário"""
     try:
-        bot = Bot(token=token)
+        bot = SharedSessionBot(token=token)
         user_bot = UserBot(bot, bot_data, db)
         dispatcher = create_user_bot_dispatcher(user_bot)
         
@@ -44,10 +46,12 @@ async def start_user_bot(token, bot_data):
         
         # Armazena referência do bot ativo
         active_bots[token] = {
+            'bot_id': bot_data['id'],
             'bot': bot,
             'dispatcher': dispatcher,
             'task': None
         }
+        mark_bot_running(bot_data['id'])
         
         # Inicia o polling do bot
         task = asyncio.create_task(dispatcher.start_polling())
@@ -73,8 +77,9 @@ async def stop_user_bot(token):
             # Fecha a conexão do bot
             await active_bots[token]['bot'].close()
             
-            # Remove do dicionário de bots ativos
-            del active_bots[token]
+            # Remove do dicionário de bots ativos e avisa quem aguarda a parada
+            bot_id = active_bots.pop(token)['bot_id']
+            mark_bot_stopped(bot_id)
             return True
         except Exception as e:
             logger.error(f"Erro ao parar bot: {e}", exc_info=True)
@@ -83,6 +88,7 @@ async def stop_user_bot(token):
 async def monitor_new_bots():
     """Monitora e inicia novos bots adicionados ao banco de dados"""
     last_check = 0
+    wakeup = get_monitor_wakeup()
     
     while True:
         try:
@@ -105,10 +111,16 @@ async def monitor_new_bots():
                 token = bot_data['token']
                 if token in active_bots:
                     logger.info(f"Parando bot: ID {bot_data['id']}")
-                    await stop_user_bot(token)
+                    # Bots excluídos só saem do banco depois de parados
+                    if await stop_user_bot(token) and bot_data.get("status") == BotStatus.DELETED:
+                        await db.delete_user_bot(bot_data['id'], bot_data)
             
-            # Aguarda antes da próxima verificação
-            await asyncio.sleep(5)
+            # Aguarda a próxima verificação ou um pedido de parada
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
         except Exception as e:
             logger.error(f"Erro ao monitorar novos bots: {e}", exc_info=True)
             await asyncio.sleep(10)
@@ -117,16 +129,23 @@ async def run_user_bots():
     """Inicia o sistema de bots de usuários"""
     logger.info("Iniciando sistema de bots de usuários")
     
-    # Carrega bots existentes
-    user_bots = await load_user_bots()
+    # Abre a sessão HTTP compartilhada com a PushinPay
+    await pushin_pay_http.start()
     
-    # Inicia cada bot
-    for bot_data in user_bots:
-        if bot_data.get('status', False):
-            await start_user_bot(bot_data['token'], bot_data)
-    
-    # Inicia o monitoramento de novos bots
-    await monitor_new_bots()
+    try:
+        # Carrega bots existentes
+        user_bots = await load_user_bots()
+        
+        # Inicia cada bot
+        for bot_data in user_bots:
+            if bot_data.get('status', False):
+                await start_user_bot(bot_data['token'], bot_data)
+        
+        # Inicia o monitoramento de novos bots
+        await monitor_new_bots()
+    finally:
+        await pushin_pay_http.close()
+        await close_telegram_session()
 
 if __name__ == "__main__":
     asyncio.run(run_user_bots())
\ No newline at end of file